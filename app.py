@@ -5,7 +5,7 @@ Interface web para visualizar oportunidades e estatísticas
 
 import logging
 from flask import Flask, render_template_string, jsonify
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
 
 from config.settings import Settings
@@ -23,7 +23,7 @@ class Settings:
         
         # Ligas para análise (IDs da API-Football)
         # ✅ CONFIGURAÇÃO IDEAL: 10 LIGAS
-        self.TARGET_LEAGUES = [
+        self.TARGET_LEAGUES = (
             # === TOP 5 LIGAS EUROPEIAS ===
             39,   # 🏴󠁧󠁢󠁥󠁮󠁧󠁿 Premier League (Inglaterra)
             140,  # 🇪🇸 La Liga (Espanha)
@@ -41,7 +41,7 @@ class Settings:
             # === OUTRAS LIGAS EUROPEIAS OFENSIVAS ===
             94,   # 🇵🇹 Primeira Liga (Portugal)
             88    # 🇳🇱 Eredivisie (Holanda)
-        ]
+        )
         
         # Rate limiting
         self.REQUESTS_PER_DAY = 100
@@ -3,19 +3,26 @@ from datetime import datetime
 from src.api_client import APIClient
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
 
 class Analyzer:
 
-    # TODAS AS LIGAS FORÇADAS AQUI
-    LEAGUES = [
+    # TODAS AS LIGAS FORÇADAS AQUI (tuplo: constante, nunca é alterada)
+    LEAGUES = (
         39, 140, 61, 78, 135, 94, 88, 203, 179, 144,
         141, 40, 262, 301, 235, 253, 556, 566, 569, 795
-    ]
+    )
 
     def __init__(self):
         self.client = APIClient()
 
+        # Temporada europeia começa em julho: calculada uma única vez por instância
+        now = datetime.now()
+        self._season = now.year if now.month >= 7 else now.year - 1
+
+    def get_valid_season(self, league_id=None) -> int:
+        """Temporada vigente (ex.: out/2026 -> 2026, mar/2027 -> 2026)."""
+        return self._season
+
     def run_daily_analysis(self, leagues=None):
 
         # GARANTE SEMPRE A LISTA COMPLETA
@@ -23,23 +30,25 @@ class Analyzer:
             leagues = self.LEAGUES
 
         date = datetime.now().strftime("%Y-%m-%d")
-        season = datetime.now().year - 1  # API exige season anterior
+        season = self.get_valid_season()
 
-        logger.info(f"📅 Executando análise para {date} | season={season}")
-        logger.info(f"🔢 Total de ligas a consultar: {len(leagues)}")
+        logger.info("📅 Executando análise para %s | season=%s", date, season)
+        logger.info("🔢 Total de ligas a consultar: %d", len(leagues))
 
         found_any = False
 
+        logger.info("🔎 Buscando jogos de %d ligas em paralelo...", len(leagues))
+        fixtures_by_league = self.client.get_fixtures_batch(date, leagues, season)
+
         for league in leagues:
-            logger.info(f"🔎 Buscando jogos da liga {league}...")
-            fixtures = self.client.get_fixtures(date, league, season)
+            fixtures = fixtures_by_league.get(league)
 
             if not fixtures:
-                logger.info(f"⚠️ Nenhum jogo encontrado para liga {league}.")
+                logger.info("⚠️ Nenhum jogo encontrado para liga %s.", league)
                 continue
 
             found_any = True
-            logger.info(f"✅ {len(fixtures)} jogos encontrados na liga {league}")
+            logger.info("✅ %d jogos encontrados na liga %s", len(fixtures), league)
 
         if not found_any:
             logger.info("⚠️ Nenhuma das ligas retornou jogos hoje.")
@@ -1,9 +1,19 @@
 import os
 import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # orjson é opcional: cai para o parser da stdlib
+    import json
+    _loads = json.loads
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
 
 class APIClient:
     BASE_URL = "https://v3.football.api-sports.io"
@@ -15,6 +25,12 @@ class APIClient:
             logger.warning("⚠️ API key não encontrada. Defina API_FOOTBALL_KEY.")
 
         self.session = requests.Session()
+        # Pool >= workers de get_fixtures_batch; este cliente não tem ciclo de retry
+        # próprio, por isso os 429/5xx são repetidos pelo urllib3 com backoff
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504],
+                        allowed_methods=["GET"], respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retries)
+        self.session.mount("https://", adapter)
         self.session.headers.update({
             "X-RapidAPI-Key": self.api_key,
             "X-RapidAPI-Host": "v3.football.api-sports.io"
@@ -25,13 +41,32 @@ class APIClient:
         params = {"date": date, "league": league, "season": season}
 
         try:
-            logger.info(f"Buscando fixtures para {date} | league={league} | season={season}")
+            logger.info("Buscando fixtures para %s | league=%s | season=%s", date, league, season)
             resp = self.session.get(url, params=params, timeout=10)
             resp.raise_for_status()
-            return resp.json().get("response", [])
+            return _loads(resp.content).get("response", [])
         except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP ERROR league={league}: {e}")
+            logger.error("HTTP ERROR league=%s: %s", league, e)
             return []
         except Exception as e:
-            logger.error(f"Erro ao buscar fixtures league={league}: {e}")
+            logger.error("Erro ao buscar fixtures league=%s: %s", league, e)
             return []
+
+    def get_fixtures_batch(self, date: str, league_ids: Iterable[int], season: int):
+        """
+        Fixtures de várias ligas em paralelo, partilhando a mesma Session.
+        Devolve {league_id: fixtures} (lista vazia para ligas sem jogos ou com erro).
+        """
+        league_ids = tuple(league_ids)
+        if not league_ids:
+            return {}
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(10, len(league_ids))) as executor:
+            futures = {
+                executor.submit(self.get_fixtures, date, lid, season): lid
+                for lid in league_ids
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        return results
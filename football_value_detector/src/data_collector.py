@@ -4,7 +4,6 @@ Data Collector - Coleta e processa dados para análise Over 1.5
 
 import logging
 from typing import Dict, List
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +22,7 @@ class DataCollector:
         Returns:
             Dict com dados processados para ambos os times
         """
-        logger.info(f"Coletando stats: Home {home_team_id} vs Away {away_team_id}")
+        logger.info("Coletando stats: Home %s vs Away %s", home_team_id, away_team_id)
         
         # Busca stats dos times
         home_stats = self.api_client.get_team_statistics(home_team_id, league_id, season)
@@ -54,14 +53,14 @@ class DataCollector:
             'away_recent_goals': self._extract_recent_goals(away_stats, 5),
         }
         
-        logger.info(f"Home avg goals: {team_data['home_goals_scored_avg']:.2f} | "
-                   f"Away avg goals: {team_data['away_goals_scored_avg']:.2f}")
+        logger.info("Home avg goals: %.2f | Away avg goals: %.2f",
+                    team_data['home_goals_scored_avg'], team_data['away_goals_scored_avg'])
         
         return team_data
     
     def collect_h2h(self, home_team_id: int, away_team_id: int) -> Dict:
         """Coleta histórico de confrontos diretos"""
-        logger.info(f"Coletando H2H: {home_team_id} vs {away_team_id}")
+        logger.info("Coletando H2H: %s vs %s", home_team_id, away_team_id)
         
         h2h_matches = self.api_client.get_h2h(home_team_id, away_team_id, last=10)
         
@@ -73,9 +72,8 @@ class DataCollector:
         over_count = 0
         
         for match in h2h_matches:
-            home_goals = match.get('goals', {}).get('home', 0)
-            away_goals = match.get('goals', {}).get('away', 0)
-            total = home_goals + away_goals
+            goals = match.get('goals', {})
+            total = goals.get('home', 0) + goals.get('away', 0)
             
             total_goals_list.append(total)
             if total > 1:  # Over 1.5
@@ -84,7 +82,7 @@ class DataCollector:
         over_rate = over_count / len(h2h_matches) if h2h_matches else 0.70
         avg_goals = sum(total_goals_list) / len(total_goals_list) if total_goals_list else 2.5
         
-        logger.info(f"H2H: {len(h2h_matches)} jogos | Over 1.5: {over_rate:.1%} | Avg: {avg_goals:.2f} gols")
+        logger.info("H2H: %d jogos | Over 1.5: %.1f%% | Avg: %.2f gols", len(h2h_matches), over_rate * 100, avg_goals)
         
         return {
             'over_1_5_rate': over_rate,
@@ -108,7 +106,7 @@ class DataCollector:
                 'season_phase': self._determine_season_phase(round_num)
             }
             
-            logger.info(f"Contexto: Rodada {round_num} | Fase: {context['season_phase']}")
+            logger.info("Contexto: Rodada %s | Fase: %s", round_num, context['season_phase'])
             
             return context
             
@@ -131,13 +129,14 @@ class DataCollector:
     def _calculate_under_rate(self, stats: Dict, venue: str) -> float:
         """Calcula taxa de Under 1.5 de um time"""
         try:
-            # Tenta extrair de fixtures (se API fornece breakdown)
-            fixtures = stats.get('fixtures', {})
-            played = fixtures.get('played', {}).get(venue, 0)
-            
-            if played == 0:
+            # Acesso direto: chaves em falta contam como 0 jogos e níveis a null caem no
+            # default; played None não é 0 e segue para a heurística
+            if stats['fixtures']['played'][venue] == 0:
                 return 0.30  # Default: 30% Under (70% Over)
-            
+        except (KeyError, TypeError):
+            return 0.30
+
+        try:
             # Estima Under baseado em média de gols
             avg_goals = self._safe_float(stats, ['goals', 'for', 'average', venue], 1.5)
             avg_conceded = self._safe_float(stats, ['goals', 'against', 'average', venue], 1.5)
@@ -160,13 +159,18 @@ class DataCollector:
     def _calculate_strength(self, stats: Dict, venue: str) -> float:
         """Calcula força do time (0-1) baseado em win rate"""
         try:
-            fixtures = stats.get('fixtures', {})
-            wins = fixtures.get('wins', {}).get(venue, 0)
-            played = fixtures.get('played', {}).get(venue, 1)
-            
+            # Acesso direto; chaves em falta valem os defaults de sempre (0 vitórias, 1 jogo)
+            # e níveis a null caem no TypeError
+            try:
+                wins = stats['fixtures']['wins'][venue]
+            except KeyError:
+                wins = 0
+            try:
+                played = stats['fixtures']['played'][venue]
+            except KeyError:
+                played = 1
             return wins / played if played > 0 else 0.5
-            
-        except Exception:
+        except (KeyError, TypeError):
             return 0.5
     
     def _extract_recent_goals(self, stats: Dict, num_games: int = 5) -> List[int]:
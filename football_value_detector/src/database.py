@@ -4,11 +4,98 @@ Database Manager - Sistema Over 1.5
 
 import logging
 import sqlite3
+from contextlib import contextmanager
+from itertools import chain
+from operator import itemgetter
 from datetime import datetime, timedelta
 from typing import Dict, List
 
 logger = logging.getLogger(__name__)
 
+# WAL: leituras não bloqueiam durante a escrita e cada commit faz um só fsync.
+# auto_vacuum tem de vir antes do WAL e só pega numa base nova (as existentes ignoram-no)
+CONNECTION_PRAGMAS = """
+    PRAGMA auto_vacuum=INCREMENTAL;
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-20000;
+    PRAGMA mmap_size=268435456;
+    PRAGMA busy_timeout=5000;
+"""
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS opportunities (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        match_id INTEGER NOT NULL,
+        home_team TEXT NOT NULL,
+        away_team TEXT NOT NULL,
+        league TEXT NOT NULL,
+        match_date TEXT NOT NULL,
+        our_probability REAL NOT NULL,
+        over_1_5_odds REAL NOT NULL,
+        expected_value REAL NOT NULL,
+        bet_quality TEXT NOT NULL,
+        analyzed_at TEXT NOT NULL,
+        UNIQUE(match_id)
+    );
+    -- (match_date, expected_value): serve os intervalos por data e, para o mesmo
+    -- instante, já devolve pela ordem do EV; substitui o índice só em match_date
+    CREATE INDEX IF NOT EXISTS idx_opp_date_ev ON opportunities(match_date, expected_value DESC);
+    DROP INDEX IF EXISTS idx_opportunities_match_date;
+"""
+
+# Colunas gravadas, pela ordem dos placeholders; todas obrigatórias na oportunidade
+OPPORTUNITY_COLUMNS = (
+    'match_id', 'home_team', 'away_team', 'league', 'match_date',
+    'our_probability', 'over_1_5_odds', 'expected_value',
+    'bet_quality', 'analyzed_at',
+)
+_REQUIRED_OPP_KEYS = frozenset(OPPORTUNITY_COLUMNS)
+_opportunity_row = itemgetter(*OPPORTUNITY_COLUMNS)
+
+INSERT_OPPORTUNITY_PREFIX = """
+    INSERT INTO opportunities (
+        match_id, home_team, away_team, league, match_date,
+        our_probability, over_1_5_odds, expected_value,
+        bet_quality, analyzed_at
+    ) VALUES """
+ROW_PLACEHOLDERS = "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+# UPSERT em vez de INSERT OR REPLACE: atualiza a linha no sítio (mantém o id, sem apagar e reinserir)
+UPSERT_SUFFIX = """
+    ON CONFLICT(match_id) DO UPDATE SET
+        home_team = excluded.home_team,
+        away_team = excluded.away_team,
+        league = excluded.league,
+        match_date = excluded.match_date,
+        our_probability = excluded.our_probability,
+        over_1_5_odds = excluded.over_1_5_odds,
+        expected_value = excluded.expected_value,
+        bet_quality = excluded.bet_quality,
+        analyzed_at = excluded.analyzed_at
+"""
+INSERT_OPPORTUNITY = INSERT_OPPORTUNITY_PREFIX + ROW_PLACEHOLDERS + UPSERT_SUFFIX
+
+# Linhas por INSERT multi-VALUES (100 x 10 parâmetros, bem abaixo do limite do SQLite)
+INSERT_CHUNK_ROWS = 100
+INSERT_OPPORTUNITY_CHUNK = (
+    INSERT_OPPORTUNITY_PREFIX + ", ".join([ROW_PLACEHOLDERS] * INSERT_CHUNK_ROWS) + UPSERT_SUFFIX
+)
+
+# SQL fixo por consulta: o mesmo objeto de string acerta sempre na cache de statements do sqlite3.
+# match_date é texto ISO 8601: intervalos [início, fim) sobre a coluna nua usam o índice
+SELECT_TODAY = """
+    SELECT * FROM opportunities
+    WHERE match_date >= ? AND match_date < ?
+    ORDER BY expected_value DESC
+"""
+SELECT_UPCOMING = """
+    SELECT * FROM opportunities
+    WHERE match_date >= ? AND match_date < ?
+    ORDER BY match_date ASC, expected_value DESC
+"""
+DELETE_OLD = "DELETE FROM opportunities WHERE match_date < ?"
+
 
 class Database:
     """Gerencia banco SQLite"""
@@ -23,6 +110,10 @@ class Database:
         try:
             self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
             self.conn.row_factory = sqlite3.Row
+            self.conn.executescript(CONNECTION_PRAGMAS)
+            mode = self.conn.execute("PRAGMA journal_mode").fetchone()[0]
+            if mode != "wal":
+                logger.warning("⚠️ WAL não ativado (journal_mode=%s)", mode)
             logger.info(f"✅ Conectado ao banco: {self.db_path}")
         except Exception as e:
             logger.error(f"❌ Erro ao conectar: {e}")
@@ -30,69 +121,75 @@ class Database:
     
     def _create_tables(self):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS opportunities (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    match_id INTEGER NOT NULL,
-                    home_team TEXT NOT NULL,
-                    away_team TEXT NOT NULL,
-                    league TEXT NOT NULL,
-                    match_date TEXT NOT NULL,
-                    our_probability REAL NOT NULL,
-                    over_1_5_odds REAL NOT NULL,
-                    expected_value REAL NOT NULL,
-                    bet_quality TEXT NOT NULL,
-                    analyzed_at TEXT NOT NULL,
-                    UNIQUE(match_id)
-                )
-            """)
-            self.conn.commit()
+            # Um só script DDL: executescript faz o commit no fim
+            self.conn.executescript(SCHEMA)
             logger.info("✅ Tabelas criadas")
         except Exception as e:
             logger.error(f"❌ Erro ao criar tabelas: {e}")
             raise
     
     def save_opportunity(self, opportunity: Dict) -> bool:
+        return self.save_opportunities([opportunity]) == 1
+
+    def save_opportunities(self, opportunities: List[Dict]) -> int:
+        """Grava várias oportunidades numa única transação (um só commit)."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO opportunities (
-                    match_id, home_team, away_team, league, match_date,
-                    our_probability, over_1_5_odds, expected_value,
-                    bet_quality, analyzed_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                opportunity['match_id'],
-                opportunity['home_team'],
-                opportunity['away_team'],
-                opportunity['league'],
-                opportunity['match_date'],
-                opportunity['our_probability'],
-                opportunity['over_1_5_odds'],
-                opportunity['expected_value'],
-                opportunity['bet_quality'],
-                opportunity['analyzed_at']
-            ))
-            self.conn.commit()
-            logger.info(f"✅ Oportunidade salva: {opportunity['home_team']} vs {opportunity['away_team']}")
-            return True
+            rows = []
+            for o in opportunities:
+                # Diferença de conjuntos em C em vez de um `in` por chave
+                missing = _REQUIRED_OPP_KEYS - o.keys()
+                if missing:
+                    logger.error("❌ Oportunidade ignorada, faltam campos: %s", ", ".join(sorted(missing)))
+                    continue
+                rows.append(_opportunity_row(o))
+            if not rows:
+                return 0
+            with self._atomic("opps_bulk"):
+                self._insert_rows(rows)
+            logger.info("✅ %d oportunidade(s) salva(s)", len(rows))
+            return len(rows)
         except Exception as e:
             logger.error(f"❌ Erro ao salvar: {e}")
-            return False
+            return 0
+    
+    @contextmanager
+    def _atomic(self, name: str):
+        """
+        Bloco atómico de escrita. Com uma transação já aberta pelo chamador usa um
+        SAVEPOINT em vez de BEGIN/COMMIT, para não fechar a transação dele nem perder
+        as escritas em caso de erro; sem ela, uma transação própria (with conn)
+        """
+        if self.conn.in_transaction:
+            self.conn.execute(f"SAVEPOINT {name}")
+            try:
+                yield
+            except Exception:
+                self.conn.execute(f"ROLLBACK TO {name}")
+                self.conn.execute(f"RELEASE {name}")
+                raise
+            self.conn.execute(f"RELEASE {name}")
+        else:
+            with self.conn:
+                yield
     
+    def _insert_rows(self, rows: List[tuple]):
+        full = len(rows) - len(rows) % INSERT_CHUNK_ROWS
+        # Blocos completos num só statement cada; o resto vai por executemany
+        for start in range(0, full, INSERT_CHUNK_ROWS):
+            chunk = rows[start:start + INSERT_CHUNK_ROWS]
+            self.conn.execute(INSERT_OPPORTUNITY_CHUNK, tuple(chain.from_iterable(chunk)))
+        if full < len(rows):
+            self.conn.executemany(INSERT_OPPORTUNITY, rows[full:])
+
     def get_today_opportunities(self) -> List[Dict]:
         """Retorna oportunidades de hoje"""
         try:
             cursor = self.conn.cursor()
-            today = datetime.now().date().isoformat()
-            cursor.execute("""
-                SELECT * FROM opportunities
-                WHERE DATE(match_date) = ?
-                ORDER BY expected_value DESC
-            """, (today,))
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            today = datetime.now().date()
+            tomorrow = today + timedelta(days=1)
+            cursor.execute(SELECT_TODAY, (today.isoformat(), tomorrow.isoformat()))
+            # Itera o cursor diretamente: sem a lista intermédia de fetchall()
+            return [dict(row) for row in cursor]
         except Exception as e:
             logger.error(f"❌ Erro ao buscar oportunidades: {e}")
             return []
@@ -101,17 +198,15 @@ class Database:
         """Retorna oportunidades dos próximos N dias"""
         try:
             cursor = self.conn.cursor()
-            start_date = datetime.now().date().isoformat()
-            end_date = (datetime.now() + timedelta(days=days)).date().isoformat()
+            today = datetime.now().date()
+            start_date = today.isoformat()
+            # BETWEEN sobre DATE() incluía o dia final inteiro: limite exclusivo no dia seguinte
+            end_date = (today + timedelta(days=days + 1)).isoformat()
             
-            cursor.execute("""
-                SELECT * FROM opportunities
-                WHERE DATE(match_date) BETWEEN ? AND ?
-                ORDER BY match_date ASC, expected_value DESC
-            """, (start_date, end_date))
+            cursor.execute(SELECT_UPCOMING, (start_date, end_date))
             
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            # Itera o cursor diretamente: sem a lista intermédia de fetchall()
+            return [dict(row) for row in cursor]
         except Exception as e:
             logger.error(f"❌ Erro ao buscar oportunidades futuras: {e}")
             return []
@@ -135,6 +230,25 @@ class Database:
             logger.error(f"❌ Erro ao calcular estatísticas: {e}")
             return {}
     
+    def clear_old_data(self, days: int = 30) -> int:
+        """Remove oportunidades com jogo há mais de N dias e devolve as páginas livres ao disco"""
+        try:
+            cutoff = (datetime.now().date() - timedelta(days=days)).isoformat()
+            with self._atomic("clear_old"):
+                deleted = self.conn.execute(DELETE_OLD, (cutoff,)).rowcount
+            # Liberta até 1000 páginas (no-op sem auto_vacuum incremental). O sqlite3 só dá
+            # um passo ao pragma por execute (uma página), por isso repete-se por página
+            # livre; executescript faria tudo de uma vez mas com um COMMIT implícito, que
+            # fecharia uma transação aberta pelo chamador
+            free_pages = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+            for _ in range(min(free_pages, 1000)):
+                self.conn.execute("PRAGMA incremental_vacuum(1)")
+            logger.info("🧹 %d oportunidade(s) antiga(s) removida(s)", deleted)
+            return deleted
+        except Exception as e:
+            logger.error(f"❌ Erro ao limpar dados antigos: {e}")
+            return 0
+
     def close(self):
         if self.conn:
             self.conn.close()
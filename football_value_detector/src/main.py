@@ -1,4 +1,3 @@
-import os
 import asyncio
 import logging
 from fastapi import FastAPI
@@ -11,6 +10,19 @@ logger = logging.getLogger(__name__)
 app = FastAPI()
 analyzer = Analyzer()
 
+# Evita duas análises em simultâneo (ciclo diário e /run)
+analysis_lock = asyncio.Lock()
+
+async def run_daily_task() -> bool:
+    """Executa uma análise; devolve False se já houver outra a correr."""
+    if analysis_lock.locked():
+        logger.info("⏭️ Análise já em curso, execução ignorada.")
+        return False
+    async with analysis_lock:
+        # A análise é síncrona e demorada: corre numa thread para não bloquear o event loop
+        await asyncio.to_thread(analyzer.run_daily_analysis)
+    return True
+
 async def daily_scheduler():
     await asyncio.sleep(5)
     logger.info("⏳ Scheduler diário iniciado.")
@@ -18,8 +30,10 @@ async def daily_scheduler():
     while True:
         try:
             logger.info("🚀 Executando análise diária automática...")
-            analyzer.run_daily_analysis()
-            logger.info("✅ Análise diária concluída.")
+            if await run_daily_task():
+                logger.info("✅ Análise diária concluída.")
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"Erro no scheduler: {e}")
 
@@ -28,11 +42,23 @@ async def daily_scheduler():
 
 @app.on_event("startup")
 async def on_startup():
-    asyncio.create_task(daily_scheduler())
+    app.state.scheduler_task = asyncio.create_task(daily_scheduler())
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    task = getattr(app.state, "scheduler_task", None)
+    if task:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        logger.info("🛑 Scheduler diário parado.")
 
 @app.get("/run")
 async def run_analysis():
-    analyzer.run_daily_analysis()
+    if not await run_daily_task():
+        return {"status": "busy", "message": "Análise já em curso."}
     return {"status": "ok", "message": "Análise executada manualmente."}
 
 if __name__ == "__main__":
@@ -4,12 +4,20 @@ Calcula probabilidades de jogos terem 2+ gols usando múltiplos indicadores
 """
 
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-import math
+from typing import Dict, Optional
+from math import exp as _exp
+from operator import mul
 
 logger = logging.getLogger(__name__)
 
+# ~72% dos jogos têm Over 1.5: valor por defeito dos indicadores sem dados
+BASELINE_OVER_RATE = 0.72
+
+
+def _poisson_over15(lam: float) -> float:
+    """P(Over 1.5) = 1 - e^-λ × (1 + λ), em forma fechada (sem estado nem dicts)."""
+    return 1.0 - _exp(-lam) * (1.0 + lam)
+
 
 class ProbabilityCalculator:
     """Calcula probabilidades Over 1.5 usando múltiplos métodos"""
@@ -26,10 +34,16 @@ class ProbabilityCalculator:
         'motivation': 0.07,        # 7% - Motivação dos times
         'match_importance': 0.05   # 5% - Importância do jogo
     }
+    # Mesma ordem que os indicadores em calculate_probability: soma ponderada por zip, sem
+    # uma consulta ao dict por indicador (e as chaves servem também para o breakdown)
+    _WEIGHT_KEYS = tuple(WEIGHTS)
+    _WEIGHT_VALUES = tuple(WEIGHTS.values())
     
-    def __init__(self):
-        """Inicializa o calculador"""
-        self.baseline_over_rate = 0.72  # ~72% dos jogos têm Over 1.5
+    # Mantido como atributo público; internamente usa-se a constante do módulo
+    baseline_over_rate = BASELINE_OVER_RATE
+
+    # Sem estado por instância: nem __dict__ por objeto
+    __slots__ = ()
         
     def calculate_probability(
         self,
@@ -50,7 +64,12 @@ class ProbabilityCalculator:
         Returns:
             Dict com probabilidade final e breakdown
         """
+        # Único try do cálculo: os indicadores _calculate_* não têm try próprio, e
+        # qualquer falha neles devolve aqui a probabilidade base
         try:
+            if not isinstance(home_stats, dict) or not isinstance(away_stats, dict):
+                raise TypeError("estatísticas dos times devem ser dicts")
+
             # 1. INDICADORES PRIMÁRIOS (50%)
             poisson_prob = self._calculate_poisson_over_probability(
                 home_stats, away_stats
@@ -89,20 +108,18 @@ class ProbabilityCalculator:
             )
             
             # 4. CÁLCULO FINAL PONDERADO
-            final_probability = (
-                poisson_prob * self.WEIGHTS['poisson'] +
-                historical_prob * self.WEIGHTS['historical_rate'] +
-                recent_prob * self.WEIGHTS['recent_trend'] +
-                h2h_prob * self.WEIGHTS['h2h'] +
-                offensive_prob * self.WEIGHTS['offensive_strength'] +
-                offensive_trend_prob * self.WEIGHTS['offensive_trend'] +
-                season_adjustment * self.WEIGHTS['season_phase'] +
-                motivation_adjustment * self.WEIGHTS['motivation'] +
-                importance_adjustment * self.WEIGHTS['match_importance']
+            indicators = (
+                poisson_prob, historical_prob, recent_prob,
+                h2h_prob, offensive_prob, offensive_trend_prob,
+                season_adjustment, motivation_adjustment, importance_adjustment
             )
+            final_probability = sum(map(mul, indicators, self._WEIGHT_VALUES))
             
-            # Garantir que está entre 0 e 1
-            final_probability = max(0.0, min(1.0, final_probability))
+            # Garantir que está entre 0 e 1 (comparações diretas, sem chamar max/min)
+            if final_probability < 0.0:
+                final_probability = 0.0
+            elif final_probability > 1.0:
+                final_probability = 1.0
             
             # 5. CONFIANÇA DO CÁLCULO
             confidence = self._calculate_confidence(
@@ -113,22 +130,15 @@ class ProbabilityCalculator:
                 'probability': round(final_probability, 4),
                 'confidence': round(confidence, 2),
                 'breakdown': {
-                    'poisson': round(poisson_prob, 4),
-                    'historical_rate': round(historical_prob, 4),
-                    'recent_trend': round(recent_prob, 4),
-                    'h2h': round(h2h_prob, 4),
-                    'offensive_strength': round(offensive_prob, 4),
-                    'offensive_trend': round(offensive_trend_prob, 4),
-                    'season_phase': round(season_adjustment, 4),
-                    'motivation': round(motivation_adjustment, 4),
-                    'match_importance': round(importance_adjustment, 4)
+                    key: round(value, 4)
+                    for key, value in zip(self._WEIGHT_KEYS, indicators)
                 }
             }
             
         except Exception as e:
             logger.error(f"Erro ao calcular probabilidade: {e}")
             return {
-                'probability': self.baseline_over_rate,
+                'probability': BASELINE_OVER_RATE,
                 'confidence': 0.30,
                 'breakdown': {},
                 'error': str(e)
@@ -149,34 +159,26 @@ class ProbabilityCalculator:
         Usando Poisson: P(X=k) = (λ^k * e^-λ) / k!
         P(Under 1.5) = e^-λ × (1 + λ)
         """
-        try:
-            # Gols esperados do time da casa
-            home_attack = home_stats.get('goals_for_avg', 1.5)
-            away_defense = away_stats.get('goals_against_avg', 1.5)
-            lambda_home = (home_attack + away_defense) / 2
-            
-            # Gols esperados do time visitante
-            away_attack = away_stats.get('goals_for_avg', 1.2)
-            home_defense = home_stats.get('goals_against_avg', 1.2)
-            lambda_away = (away_attack + home_defense) / 2
-            
-            # Lambda total (gols esperados no jogo)
-            lambda_total = lambda_home + lambda_away
-            
-            # P(Under 1.5) = e^-λ × (1 + λ)
-            prob_under = math.exp(-lambda_total) * (1 + lambda_total)
-            
-            # P(Over 1.5) = 1 - P(Under 1.5)
-            prob_over = 1 - prob_under
-            
-            logger.debug(f"Poisson: λ_home={lambda_home:.2f}, λ_away={lambda_away:.2f}, "
-                        f"λ_total={lambda_total:.2f}, P(Over 1.5)={prob_over:.4f}")
-            
-            return prob_over
-            
-        except Exception as e:
-            logger.error(f"Erro no cálculo Poisson: {e}")
-            return self.baseline_over_rate
+        # Gols esperados do time da casa
+        home_attack = home_stats.get('goals_for_avg', 1.5)
+        away_defense = away_stats.get('goals_against_avg', 1.5)
+        lambda_home = (home_attack + away_defense) / 2
+        
+        # Gols esperados do time visitante
+        away_attack = away_stats.get('goals_for_avg', 1.2)
+        home_defense = home_stats.get('goals_against_avg', 1.2)
+        lambda_away = (away_attack + home_defense) / 2
+        
+        # Lambda total (gols esperados no jogo)
+        lambda_total = lambda_home + lambda_away
+        
+        # P(Over 1.5) = 1 - P(Under 1.5), com P(Under 1.5) = e^-λ × (1 + λ)
+        prob_over = _poisson_over15(lambda_total)
+        
+        logger.debug("Poisson: λ_home=%.2f, λ_away=%.2f, λ_total=%.2f, P(Over 1.5)=%.4f",
+                     lambda_home, lambda_away, lambda_total, prob_over)
+        
+        return prob_over
     
     def _calculate_historical_rate(
         self,
@@ -186,18 +188,13 @@ class ProbabilityCalculator:
         """
         Calcula probabilidade baseada na taxa histórica Over 1.5
         """
-        try:
-            home_rate = home_stats.get('over_1_5_rate', 0.72)
-            away_rate = away_stats.get('over_1_5_rate', 0.72)
-            
-            # Média ponderada (casa tem mais peso)
-            historical_prob = (home_rate * 0.55) + (away_rate * 0.45)
-            
-            return historical_prob
-            
-        except Exception as e:
-            logger.error(f"Erro ao calcular taxa histórica: {e}")
-            return self.baseline_over_rate
+        home_rate = home_stats.get('over_1_5_rate', 0.72)
+        away_rate = away_stats.get('over_1_5_rate', 0.72)
+        
+        # Média ponderada (casa tem mais peso)
+        historical_prob = (home_rate * 0.55) + (away_rate * 0.45)
+        
+        return historical_prob
     
     def _calculate_recent_trend(
         self,
@@ -207,18 +204,13 @@ class ProbabilityCalculator:
         """
         Analisa tendência recente (últimos 5 jogos)
         """
-        try:
-            home_recent = home_stats.get('recent_over_1_5_rate', 0.72)
-            away_recent = away_stats.get('recent_over_1_5_rate', 0.72)
-            
-            # Média das tendências recentes
-            recent_prob = (home_recent + away_recent) / 2
-            
-            return recent_prob
-            
-        except Exception as e:
-            logger.error(f"Erro ao calcular tendência recente: {e}")
-            return self.baseline_over_rate
+        home_recent = home_stats.get('recent_over_1_5_rate', 0.72)
+        away_recent = away_stats.get('recent_over_1_5_rate', 0.72)
+        
+        # Média das tendências recentes
+        recent_prob = (home_recent + away_recent) / 2
+        
+        return recent_prob
     
     def _calculate_h2h_probability(
         self,
@@ -227,31 +219,29 @@ class ProbabilityCalculator:
         """
         Calcula probabilidade baseada em confrontos diretos
         """
-        try:
-            if not h2h_data or not h2h_data.get('matches'):
-                return self.baseline_over_rate
-            
-            matches = h2h_data['matches']
-            if len(matches) == 0:
-                return self.baseline_over_rate
-            
+        if not h2h_data:
+            return BASELINE_OVER_RATE
+        
+        # Resumo já agregado pelo DataCollector.collect_h2h: sem voltar a percorrer os jogos
+        sample_size = h2h_data.get('sample_size')
+        if sample_size and h2h_data.get('over_1_5_rate') is not None:
+            h2h_rate = h2h_data['over_1_5_rate']
+        else:
+            matches = h2h_data.get('matches')
+            if not matches:
+                return BASELINE_OVER_RATE
+            sample_size = len(matches)
             # Conta jogos Over 1.5 no H2H
-            over_count = sum(
+            h2h_rate = sum(
                 1 for match in matches
                 if match.get('total_goals', 0) >= 2
-            )
-            
-            h2h_rate = over_count / len(matches)
-            
-            # Dá menos peso se tiver poucos jogos H2H
-            if len(matches) < 3:
-                h2h_rate = (h2h_rate * 0.6) + (self.baseline_over_rate * 0.4)
-            
-            return h2h_rate
-            
-        except Exception as e:
-            logger.error(f"Erro ao calcular H2H: {e}")
-            return self.baseline_over_rate
+            ) / sample_size
+        
+        # Dá menos peso se tiver poucos jogos H2H
+        if sample_size < 3:
+            h2h_rate = (h2h_rate * 0.6) + (BASELINE_OVER_RATE * 0.4)
+        
+        return h2h_rate
     
     def _calculate_offensive_strength(
         self,
@@ -261,29 +251,24 @@ class ProbabilityCalculator:
         """
         Avalia força ofensiva combinada dos times
         """
-        try:
-            home_attack = home_stats.get('goals_for_avg', 1.5)
-            away_attack = away_stats.get('goals_for_avg', 1.2)
-            
-            total_attack = home_attack + away_attack
-            
-            # Normaliza para probabilidade
-            # Se total_attack >= 3.0, prob = 0.85+
-            # Se total_attack <= 1.5, prob = 0.50-
-            if total_attack >= 3.0:
-                prob = 0.85 + min((total_attack - 3.0) * 0.05, 0.10)
-            elif total_attack >= 2.5:
-                prob = 0.75
-            elif total_attack >= 2.0:
-                prob = 0.65
-            else:
-                prob = 0.50 + (total_attack - 1.5) * 0.3
-            
-            return min(prob, 0.95)
-            
-        except Exception as e:
-            logger.error(f"Erro ao calcular força ofensiva: {e}")
-            return self.baseline_over_rate
+        home_attack = home_stats.get('goals_for_avg', 1.5)
+        away_attack = away_stats.get('goals_for_avg', 1.2)
+        
+        total_attack = home_attack + away_attack
+        
+        # Normaliza para probabilidade
+        # Se total_attack >= 3.0, prob = 0.85+
+        # Se total_attack <= 1.5, prob = 0.50-
+        if total_attack >= 3.0:
+            prob = 0.85 + min((total_attack - 3.0) * 0.05, 0.10)
+        elif total_attack >= 2.5:
+            prob = 0.75
+        elif total_attack >= 2.0:
+            prob = 0.65
+        else:
+            prob = 0.50 + (total_attack - 1.5) * 0.3
+        
+        return min(prob, 0.95)
     
     def _calculate_offensive_trend(
         self,
@@ -293,28 +278,23 @@ class ProbabilityCalculator:
         """
         Avalia tendência ofensiva recente
         """
-        try:
-            home_trend = home_stats.get('recent_goals_avg', 1.5)
-            away_trend = away_stats.get('recent_goals_avg', 1.2)
-            
-            # Compara com média geral
-            home_general = home_stats.get('goals_for_avg', 1.5)
-            away_general = away_stats.get('goals_for_avg', 1.2)
-            
-            # Se times estão marcando mais recentemente = maior prob Over
-            home_improvement = (home_trend / home_general) if home_general > 0 else 1.0
-            away_improvement = (away_trend / away_general) if away_general > 0 else 1.0
-            
-            avg_improvement = (home_improvement + away_improvement) / 2
-            
-            # Ajusta baseline baseado na melhora
-            prob = self.baseline_over_rate * avg_improvement
-            
-            return min(prob, 0.95)
-            
-        except Exception as e:
-            logger.error(f"Erro ao calcular tendência ofensiva: {e}")
-            return self.baseline_over_rate
+        home_trend = home_stats.get('recent_goals_avg', 1.5)
+        away_trend = away_stats.get('recent_goals_avg', 1.2)
+        
+        # Compara com média geral
+        home_general = home_stats.get('goals_for_avg', 1.5)
+        away_general = away_stats.get('goals_for_avg', 1.2)
+        
+        # Se times estão marcando mais recentemente = maior prob Over
+        home_improvement = (home_trend / home_general) if home_general > 0 else 1.0
+        away_improvement = (away_trend / away_general) if away_general > 0 else 1.0
+        
+        avg_improvement = (home_improvement + away_improvement) / 2
+        
+        # Ajusta baseline baseado na melhora
+        prob = BASELINE_OVER_RATE * avg_improvement
+        
+        return min(prob, 0.95)
     
     def _calculate_season_phase_adjustment(
         self,
@@ -325,28 +305,23 @@ class ProbabilityCalculator:
         Início: times mais cautelosos
         Final: times mais agressivos (necessidade de pontos)
         """
-        try:
-            if not match_context:
-                return self.baseline_over_rate
-            
-            round_num = match_context.get('round', 20)
-            total_rounds = match_context.get('total_rounds', 38)
-            
-            phase = round_num / total_rounds
-            
-            # Início (0-0.25): 0.70
-            # Meio (0.25-0.75): 0.72
-            # Final (0.75-1.0): 0.75
-            if phase < 0.25:
-                return 0.70
-            elif phase < 0.75:
-                return 0.72
-            else:
-                return 0.75
-                
-        except Exception as e:
-            logger.error(f"Erro ao calcular fase da temporada: {e}")
-            return self.baseline_over_rate
+        if not match_context:
+            return BASELINE_OVER_RATE
+        
+        round_num = match_context.get('round', 20)
+        total_rounds = match_context.get('total_rounds', 38)
+        
+        phase = round_num / total_rounds
+        
+        # Início (0-0.25): 0.70
+        # Meio (0.25-0.75): 0.72
+        # Final (0.75-1.0): 0.75
+        if phase < 0.25:
+            return 0.70
+        elif phase < 0.75:
+            return 0.72
+        else:
+            return 0.75
     
     def _calculate_motivation_factor(
         self,
@@ -356,31 +331,26 @@ class ProbabilityCalculator:
         Avalia motivação dos times (título, Europa, rebaixamento)
         Times motivados = mais gols
         """
-        try:
-            if not match_context:
-                return self.baseline_over_rate
-            
-            home_position = match_context.get('home_position', 10)
-            away_position = match_context.get('away_position', 10)
-            total_teams = match_context.get('total_teams', 20)
-            
-            # Times no topo (1-4) ou no fundo (últimos 3) = alta motivação
-            high_motivation_positions = list(range(1, 5)) + \
-                                       list(range(total_teams - 2, total_teams + 1))
-            
-            home_motivated = home_position in high_motivation_positions
-            away_motivated = away_position in high_motivation_positions
-            
-            if home_motivated and away_motivated:
-                return 0.78  # Ambos motivados = jogo aberto
-            elif home_motivated or away_motivated:
-                return 0.75  # Um motivado
-            else:
-                return 0.70  # Jogo morno
-                
-        except Exception as e:
-            logger.error(f"Erro ao calcular motivação: {e}")
-            return self.baseline_over_rate
+        if not match_context:
+            return BASELINE_OVER_RATE
+        
+        home_position = match_context.get('home_position', 10)
+        away_position = match_context.get('away_position', 10)
+        total_teams = match_context.get('total_teams', 20)
+        
+        # Times no topo (1-4) ou no fundo (últimos 3) = alta motivação
+        high_motivation_positions = list(range(1, 5)) + \
+                                   list(range(total_teams - 2, total_teams + 1))
+        
+        home_motivated = home_position in high_motivation_positions
+        away_motivated = away_position in high_motivation_positions
+        
+        if home_motivated and away_motivated:
+            return 0.78  # Ambos motivados = jogo aberto
+        elif home_motivated or away_motivated:
+            return 0.75  # Um motivado
+        else:
+            return 0.70  # Jogo morno
     
     def _calculate_match_importance(
         self,
@@ -390,21 +360,16 @@ class ProbabilityCalculator:
         Avalia importância do jogo
         Derby, clássico = mais gols
         """
-        try:
-            if not match_context:
-                return self.baseline_over_rate
-            
-            is_derby = match_context.get('is_derby', False)
-            is_classic = match_context.get('is_classic', False)
-            
-            if is_derby or is_classic:
-                return 0.78
-            
-            return self.baseline_over_rate
-            
-        except Exception as e:
-            logger.error(f"Erro ao calcular importância: {e}")
-            return self.baseline_over_rate
+        if not match_context:
+            return BASELINE_OVER_RATE
+        
+        is_derby = match_context.get('is_derby', False)
+        is_classic = match_context.get('is_classic', False)
+        
+        if is_derby or is_classic:
+            return 0.78
+        
+        return BASELINE_OVER_RATE
     
     def _calculate_confidence(
         self,
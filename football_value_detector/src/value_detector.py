@@ -4,7 +4,8 @@ Detecta apostas com valor positivo (EV+) comparando probabilidades vs odds
 """
 
 import logging
-from typing import Dict, List, Optional, Tuple
+from operator import itemgetter
+from typing import Dict, List, Optional
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -48,7 +49,7 @@ class ValueDetector:
             over_odds = odds_data.get('over_1_5_odds')
             
             if not over_odds or over_odds < self.MIN_ODDS:
-                logger.debug(f"Odds Over 1.5 não disponível ou muito baixa: {over_odds}")
+                logger.debug("Odds Over 1.5 não disponível ou muito baixa: %s", over_odds)
                 return None
             
             # 2. Verifica critérios mínimos
@@ -107,15 +108,15 @@ class ValueDetector:
             }
             
             logger.info(
-                f"✅ VALOR DETECTADO: {match_data.get('home_team')} vs "
-                f"{match_data.get('away_team')} | EV: {expected_value:.2%} | "
-                f"Stake: {kelly_stake:.1%} | Qualidade: {bet_quality}"
+                "✅ VALOR DETECTADO: %s vs %s | EV: %.2f%% | Stake: %.1f%% | Qualidade: %s",
+                match_data.get('home_team'), match_data.get('away_team'),
+                expected_value * 100, kelly_stake * 100, bet_quality
             )
             
             return result
             
         except Exception as e:
-            logger.error(f"Erro ao analisar jogo: {e}")
+            logger.error("Erro ao analisar jogo: %s", e)
             return None
     
     def _meets_criteria(
@@ -126,26 +127,29 @@ class ValueDetector:
     ) -> bool:
         """
         Verifica se o jogo atende aos critérios mínimos
+        
+        Ordem: do teste mais barato e que mais rejeita (odds fora do intervalo)
+        para o EV, só calculado quando tudo o resto passa
         """
-        # 1. Probabilidade mínima
-        if probability < self.MIN_PROBABILITY:
-            logger.debug(f"Probabilidade muito baixa: {probability:.2%}")
+        # 1. Odds dentro do range
+        if odds < self.MIN_ODDS or odds > self.MAX_ODDS:
+            logger.debug("Odds fora do intervalo: %s", odds)
             return False
         
-        # 2. Confiança mínima
-        if confidence < self.MIN_CONFIDENCE:
-            logger.debug(f"Confiança muito baixa: {confidence:.1%}")
+        # 2. Probabilidade mínima
+        if probability < self.MIN_PROBABILITY:
+            logger.debug("Probabilidade muito baixa: %.2f%%", probability * 100)
             return False
         
-        # 3. Odds dentro do range
-        if odds > self.MAX_ODDS:
-            logger.debug(f"Odds muito alta: {odds}")
+        # 3. Confiança mínima
+        if confidence < self.MIN_CONFIDENCE:
+            logger.debug("Confiança muito baixa: %.1f%%", confidence * 100)
             return False
         
-        # 4. Verifica se há valor (EV+)
-        ev = self._calculate_expected_value(probability, odds)
+        # 4. Verifica se há valor (EV+), EV = prob × odds - 1
+        ev = probability * odds - 1.0
         if ev < self.MIN_EV:
-            logger.debug(f"EV muito baixo: {ev:.2%}")
+            logger.debug("EV muito baixo: %.2f%%", ev * 100)
             return False
         
         return True
@@ -182,7 +186,7 @@ class ValueDetector:
             ev = (our_probability * odds) - 1.0
             return ev
         except Exception as e:
-            logger.error(f"Erro ao calcular EV: {e}")
+            logger.error("Erro ao calcular EV: %s", e)
             return 0.0
     
     def _calculate_kelly_stake(
@@ -199,27 +203,14 @@ class ValueDetector:
         - p = nossa probabilidade
         - q = 1 - p (probabilidade de perder)
         
-        Usamos Kelly fracionário (25%) para reduzir variância
+        Usamos Kelly fracionário (25%) e limitamos o stake a 10% do bankroll
+        (odds <= 1 não têm valor possível: stake 0)
         """
-        try:
-            b = odds - 1.0
-            p = probability
-            q = 1.0 - p
-            
-            # Kelly completo
-            kelly = (b * p - q) / b
-            
-            # Kelly fracionário (25%)
-            fractional_kelly = kelly * self.kelly_fraction
-            
-            # Limita stake máximo a 10% do bankroll
-            stake = max(0.0, min(fractional_kelly, 0.10))
-            
-            return stake
-            
-        except Exception as e:
-            logger.error(f"Erro ao calcular Kelly: {e}")
-            return 0.01  # 1% default
+        b = odds - 1.0
+        if b <= 0:
+            return 0.0
+        kelly = (b * probability - (1.0 - probability)) / b
+        return max(0.0, min(0.10, kelly * self.kelly_fraction))
     
     def _classify_bet_quality(
         self,
@@ -308,14 +299,14 @@ class ValueDetector:
             # Ordena por score (maior primeiro)
             ranked = sorted(
                 opportunities,
-                key=lambda x: x.get('ranking_score', 0),
+                key=itemgetter('ranking_score'),  # acabado de preencher acima
                 reverse=True
             )
             
             return ranked
             
         except Exception as e:
-            logger.error(f"Erro ao rankear oportunidades: {e}")
+            logger.error("Erro ao rankear oportunidades: %s", e)
             return opportunities
     
     def generate_summary(
@@ -365,6 +356,6 @@ class ValueDetector:
             }
             
         except Exception as e:
-            logger.error(f"Erro ao gerar sumário: {e}")
+            logger.error("Erro ao gerar sumário: %s", e)
             return {}
 
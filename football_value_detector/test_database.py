@@ -0,0 +1,118 @@
+"""
+Testes do Database - Sistema Over 1.5
+Gravação de oportunidades em SQLite na memória
+"""
+
+import importlib.util
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Carregado pelo caminho: o pacote src da raiz do repositório tem o mesmo nome
+_spec = importlib.util.spec_from_file_location(
+    "fvd_database", Path(__file__).parent / "src" / "database.py")
+database = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(database)
+
+
+def make_opportunity(match_id, days_from_today=1, odds=1.45):
+    """Oportunidade com todos os campos gravados"""
+    match_date = (datetime.now() + timedelta(days=days_from_today)).strftime("%Y-%m-%dT%H:%M:%S")
+    return {
+        'match_id': match_id,
+        'home_team': f"Casa {match_id}",
+        'away_team': f"Fora {match_id}",
+        'league': "Premier League",
+        'match_date': match_date,
+        'our_probability': 0.78,
+        'over_1_5_odds': odds,
+        'expected_value': 0.13,
+        'bet_quality': "BOA",
+        'analyzed_at': datetime.now().isoformat(),
+    }
+
+
+def count_rows(db):
+    return db.conn.execute("SELECT COUNT(*) FROM opportunities").fetchone()[0]
+
+
+@pytest.fixture
+def db():
+    d = database.Database(":memory:")
+    yield d
+    d.close()
+
+
+# ==================== GRAVAÇÃO ====================
+
+def test_upsert_keeps_row_id(db):
+    """Gravar de novo o mesmo jogo atualiza a linha sem mudar o id"""
+    assert db.save_opportunity(make_opportunity(1))
+    row_id = db.conn.execute("SELECT id FROM opportunities WHERE match_id = 1").fetchone()[0]
+
+    assert db.save_opportunity(make_opportunity(1, odds=1.60))
+    row = db.conn.execute("SELECT id, over_1_5_odds FROM opportunities WHERE match_id = 1").fetchone()
+    assert tuple(row) == (row_id, 1.60)
+    assert count_rows(db) == 1
+
+
+def test_chunked_insert_saves_every_row(db):
+    """Blocos multi-VALUES completos mais o resto por executemany"""
+    n = 2 * database.INSERT_CHUNK_ROWS + 7
+    assert db.save_opportunities([make_opportunity(i) for i in range(n)]) == n
+    assert count_rows(db) == n
+
+
+# ==================== LIMPEZA ====================
+
+def test_clear_old_data_commits_on_its_own(db):
+    """Sem transação do chamador a remoção fica gravada"""
+    db.save_opportunities([make_opportunity(1, days_from_today=-60), make_opportunity(2)])
+    assert db.clear_old_data(days=30) == 1
+    assert not db.conn.in_transaction
+    assert count_rows(db) == 1
+
+
+def test_clear_old_data_keeps_caller_transaction(db):
+    """Dentro de uma transação do chamador não faz commit: o rollback dele desfaz tudo"""
+    db.save_opportunities([make_opportunity(1, days_from_today=-60)])
+    db.conn.execute("UPDATE opportunities SET bet_quality = 'FRACA'")
+    assert db.conn.in_transaction
+
+    assert db.clear_old_data(days=30) == 1
+    assert db.conn.in_transaction
+    db.conn.rollback()
+
+    row = db.conn.execute("SELECT bet_quality FROM opportunities").fetchone()
+    assert row[0] == "BOA"
+
+
+# ==================== TRANSAÇÕES ====================
+
+def test_save_keeps_caller_transaction(db):
+    """Dentro de uma transação do chamador grava num SAVEPOINT, sem commit"""
+    db.save_opportunities([make_opportunity(1)])
+    db.conn.execute("UPDATE opportunities SET bet_quality = 'FRACA'")
+
+    assert db.save_opportunities([make_opportunity(2), make_opportunity(3)]) == 2
+    assert db.conn.in_transaction
+    db.conn.rollback()
+
+    assert count_rows(db) == 1
+    assert db.conn.execute("SELECT bet_quality FROM opportunities").fetchone()[0] == "BOA"
+
+
+def test_failed_save_rolls_back_only_its_rows(db):
+    """Erro a meio do lote desfaz o lote inteiro e deixa a transação do chamador intacta"""
+    db.save_opportunities([make_opportunity(1)])
+    db.conn.execute("UPDATE opportunities SET bet_quality = 'FRACA'")
+
+    batch = [make_opportunity(i) for i in range(10, 10 + database.INSERT_CHUNK_ROWS + 5)]
+    batch[-1]['home_team'] = None  # NOT NULL: falha já depois do bloco completo gravado
+    assert db.save_opportunities(batch) == 0
+    assert db.conn.in_transaction
+    assert count_rows(db) == 1
+
+    db.conn.commit()
+    assert db.conn.execute("SELECT bet_quality FROM opportunities").fetchone()[0] == "FRACA"
@@ -5,11 +5,9 @@ Agora calcula e notifica a "Odd Justa" mesmo quando o EV é negativo.
 
 import logging
 import time
-import requests
-from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Any, Union 
-import schedule
-import threading
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import List, Dict, Any
 
 # Importações dos Módulos do Projeto (Classes Mocked ou Reais)
 from config.settings import Settings
@@ -32,28 +30,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Jogos MOCK (modelo construído uma vez no import; a data é preenchida por execução)
+_MOCK_FIXTURES = (
+    {'fixture': {'id': 1386749},
+     'teams': {'home': {'name': 'Swansea', 'id': 100}, 'away': {'name': 'Derby', 'id': 101}},
+     'league': {'name': 'Championship', 'id': 40, 'season': 2024}},
+    {'fixture': {'id': 1386750},
+     'teams': {'home': {'name': 'Southampton', 'id': 102}, 'away': {'name': 'Leicester', 'id': 103}},
+     'league': {'name': 'Championship', 'id': 40, 'season': 2024}},
+)
+
 # Classes MOCK para garantir que o código seja runnable (Ajuste para suas classes reais)
 class MockSettings:
     API_FOOTBALL_KEY = "968c152b0a72f3fa63087d74b04eee5d"
-    TARGET_LEAGUES = [39, 140, 135, 78, 61, 2, 3, 40, 94, 88]
+    TARGET_LEAGUES = (39, 140, 135, 78, 61, 2, 3, 40, 94, 88)
     TELEGRAM_ENABLED = False
     TELEGRAM_BOT_TOKEN = None
     TELEGRAM_CHAT_ID = None
 
 class MockAPIClient:
+    # Odds MOCK por jogo, montadas uma vez no import (só leitura)
+    _MOCK_ODDS = {
+        1386749: MappingProxyType({'over_0_5_odds': 1.05, 'over_1_5_odds': 2.05}),
+        1386750: MappingProxyType({'over_0_5_odds': 1.10, 'over_1_5_odds': 1.25}),
+    }
+    _DEFAULT_MOCK_ODDS = MappingProxyType({'over_0_5_odds': 1.15, 'over_1_5_odds': 2.10})
+
     def __init__(self, key): pass
     def get_fixtures_by_date(self, date, league_id): return []
     def get_odds(self, fixture_id):
         """
         MOCK: Simula odds
         """
-        logger.info(f"Buscando odds para o jogo {fixture_id}...")
-        if fixture_id == 1386749: 
-             return {'over_0_5_odds': 1.05, 'over_1_5_odds': 2.05} 
-        elif fixture_id == 1386750: 
-             return {'over_0_5_odds': 1.10, 'over_1_5_odds': 1.25} 
-        else:
-             return {'over_0_5_odds': 1.15, 'over_1_5_odds': 2.10}
+        logger.info("Buscando odds para o jogo %s...", fixture_id)
+        return self._MOCK_ODDS.get(fixture_id, self._DEFAULT_MOCK_ODDS)
 
 
     def collect_team_data(self, team_id: int, league_id: int, season: int) -> Dict[str, float]:
@@ -137,6 +147,10 @@ class MockDatabase:
              return
         logger.info(f"💾 Salvando oportunidade: {opp.get('home_team')} vs {opp.get('away_team')} ({opp.get('market')})")
 
+    def save_opportunities(self, opps):
+        for opp in opps:
+            self.save_opportunity(opp)
+
     def clear_old_data(self, days): pass
 
 class MockTelegramNotifier:
@@ -217,13 +231,11 @@ class Scheduler:
             today = now_utc.date().isoformat()
             
             # MOCK: Para simular os jogos que o seu log encontrou
+            # (só o sub-dicionário 'fixture' muda com a data; o resto é partilhado)
+            kickoff = f"{today}T20:45:00+00:00"
             fixtures = [
-                {'fixture': {'id': 1386749, 'date': f"{today}T20:45:00+00:00"}, 
-                 'teams': {'home': {'name': 'Swansea', 'id': 100}, 'away': {'name': 'Derby', 'id': 101}}, 
-                 'league': {'name': 'Championship', 'id': 40, 'season': 2024}},
-                {'fixture': {'id': 1386750, 'date': f"{today}T20:45:00+00:00"}, 
-                 'teams': {'home': {'name': 'Southampton', 'id': 102}, 'away': {'name': 'Leicester', 'id': 103}}, 
-                 'league': {'name': 'Championship', 'id': 40, 'season': 2024}}
+                {**t, 'fixture': {**t['fixture'], 'date': kickoff}}
+                for t in _MOCK_FIXTURES
             ]
             
             if not fixtures:
@@ -243,8 +255,6 @@ class Scheduler:
                 
                 for opportunity in new_opportunities:
                     opportunities.append(opportunity)
-                    # A chamada para save_opportunity espera 'implied_probability'
-                    self.db.save_opportunity(opportunity)
                     
                     if self.telegram:
                         # Oportunidade Pura é notificada aqui
@@ -253,6 +263,9 @@ class Scheduler:
                 time.sleep(2)
             
             if opportunities:
+                # Gravação em lote: uma transação para toda a análise
+                # (cada oportunidade deve trazer 'implied_probability')
+                self.db.save_opportunities(opportunities)
                 # O método rank_opportunities agora existe
                 ranked = self.value_detector.rank_opportunities(opportunities)
                 self._display_results(ranked)
@@ -286,8 +299,8 @@ class Scheduler:
             fixture_id = fixture['fixture']['id']
             league_name = fixture['league']['name']
             
-            logger.info(f"⚽ {home_team} vs {away_team}")
-            logger.info(f"   Liga: {league_name} | ID: {fixture_id}")
+            logger.info("⚽ %s vs %s", home_team, away_team)
+            logger.info("   Liga: %s | ID: %s", league_name, fixture_id)
             
             # 1. Coleta dados 
             logger.info("   📊 Coletando dados dos times...")
@@ -339,9 +352,9 @@ class Scheduler:
                 
                 confidence_score = (our_probability * 0.9 + 0.1) # Simulação
                 
-                logger.info(f"   📈 Probabilidade {market_name}: {our_probability:.1%}")
-                logger.info(f"   🎯 Confiança: {confidence_score*100:.0f}%")
-                logger.info(f"   💵 Odds {market_name}: {market_odds:.2f}")
+                logger.info("   📈 Probabilidade %s: %.1f%%", market_name, our_probability * 100)
+                logger.info("   🎯 Confiança: %.0f%%", confidence_score * 100)
+                logger.info("   💵 Odds %s: %.2f", market_name, market_odds)
                 
                 # 4. Detecta valor
                 detection_result = self.value_detector.detect_value(our_probability, market_odds)
@@ -354,9 +367,9 @@ class Scheduler:
                     # =========================================================
                     # NOTIFICAÇÃO DE VALOR (Aposta com EV Positivo)
                     # =========================================================
-                    logger.info(f"   ✅ VALOR DETECTADO em {market_name}!")
-                    logger.info(f"   💵 EV: {detection_result['expected_value']:.2%}")
-                    logger.info(f"   📊 Kelly Pura (F): {detection_result['pure_kelly_fraction']:.2f}%")
+                    logger.info("   ✅ VALOR DETECTADO em %s!", market_name)
+                    logger.info("   💵 EV: %.2f%%", detection_result['expected_value'] * 100)
+                    logger.info("   📊 Kelly Pura (F): %.2f%%", detection_result['pure_kelly_fraction'])
 
                     opportunity = {
                         # Corrigido na iteração anterior
@@ -386,7 +399,7 @@ class Scheduler:
                     # =========================================================
                     if fair_odd >= 1.30 and detection_result['expected_value'] < 0:
                          
-                        logger.info(f"   💡 SUGESTÃO: Odd Justa {market_name}: {fair_odd:.2f}. EV Negativo.")
+                        logger.info("   💡 SUGESTÃO: Odd Justa %s: %.2f. EV Negativo.", market_name, fair_odd)
 
                         if self.telegram and hasattr(self.telegram, 'notify_suggestion'):
                              suggestion_data = {
@@ -398,12 +411,12 @@ class Scheduler:
                              }
                              self.telegram.notify_suggestion(suggestion_data)
                     else:
-                        logger.info(f"   ⚠️ Sem valor detectado em {market_name} (EV: {detection_result['expected_value']:.2%}).")
+                        logger.info("   ⚠️ Sem valor detectado em %s (EV: %.2f%%).", market_name, detection_result['expected_value'] * 100)
 
             return opportunities_list
             
         except Exception as e:
-            logger.error(f"   ❌ Erro ao analisar jogo: {e}")
+            logger.error("   ❌ Erro ao analisar jogo: %s", e)
             return []
     
     # ... (Restante da classe Scheduler, incluindo _display_results, run, main)
@@ -414,14 +427,14 @@ class Scheduler:
         logger.info("="*60)
         
         for i, opp in enumerate(opportunities, 1):
-            logger.info(f"\n{i}. {opp['home_team']} vs {opp['away_team']} | Mercado: {opp['market']}")
-            logger.info(f"   Liga: {opp['league']}")
-            logger.info(f"   ---")
-            logger.info(f"   Probabilidade: {opp['our_probability']:.1%}")
-            logger.info(f"   Odds Mercado: {opp['over_1_5_odds']:.2f}")
-            logger.info(f"   Expected Value: {opp['expected_value']:.2%}") # Alterado para %
-            logger.info(f"   Confiança: {opp['confidence']:.0f}%")
-            logger.info(f"   Kelly Pura (F): {opp['kelly_stake']:.2f}%") 
+            logger.info("\n%d. %s vs %s | Mercado: %s", i, opp['home_team'], opp['away_team'], opp['market'])
+            logger.info("   Liga: %s", opp['league'])
+            logger.info("   ---")
+            logger.info("   Probabilidade: %.1f%%", opp['our_probability'] * 100)
+            logger.info("   Odds Mercado: %.2f", opp['over_1_5_odds'])
+            logger.info("   Expected Value: %.2f%%", opp['expected_value'] * 100) # Alterado para %
+            logger.info("   Confiança: %.0f%%", opp['confidence'])
+            logger.info("   Kelly Pura (F): %.2f%%", opp['kelly_stake']) 
 
     def update_results(self): pass
     def cleanup_old_data(self): pass
@@ -2,18 +2,32 @@
 import os
 import logging
 from datetime import datetime
-from src.api_client import APIClient
+from itertools import repeat
+from concurrent.futures import ThreadPoolExecutor
+from src.api_client import get_client
 from src.telegram_notifier import TelegramNotifier
 from src.value_detector import ValueDetector
 from src.data_collector import DataCollector
-from src.probability_calculator import calculate_over_probability
+from src.probability_calculator import data_confidence, expected_total_goals, prob_total_over_batch
 
 logger = logging.getLogger("src.analyzer")
 
+DEFAULT_OVER_1_5_ODDS = 1.45
+MAX_WORKERS = 8  # <= pool_maxsize do APIClient
+
 class Analyzer:
+    # Ligas analisadas por omissão (run_daily_analysis sem lista explícita)
+    LEAGUES = (
+        94,  # Portugal - Primeira Liga
+        88,  # Holanda - Eredivisie
+        89,  # Holanda - Eerste Divisie (Jong AZ vs Maastricht)
+        78,  # Alemanha - Bundesliga
+        40,  # Inglaterra - Championship
+    )
+
     def __init__(self):
         api_key = os.getenv("API_FOOTBALL_KEY")
-        self.client = APIClient(api_key)
+        self.client = get_client(api_key)
         self.collector = DataCollector(self.client)
         self.detector = ValueDetector(required_ev=0.05)
         
@@ -21,46 +35,76 @@ class Analyzer:
         chat_id = os.getenv("TELEGRAM_CHAT_ID")
         self.notifier = TelegramNotifier(token, chat_id) if os.getenv("TELEGRAM_ENABLED") == "true" else None
 
+        # Temporada europeia começa em julho: calculada uma única vez por instância
+        now = datetime.now()
+        self._season = now.year if now.month >= 7 else now.year - 1
+
+    def get_valid_season(self, league_id=None) -> int:
+        """Temporada vigente (ex.: out/2026 -> 2026, mar/2027 -> 2026)."""
+        return self._season
+
+    def _evaluate_fixture(self, f, season):
+        """Dados e golos esperados de um jogo -> (jogo, mu, confiança)."""
+        h_id, a_id = f.home_id, f.away_id
+
+        # 1. Coleta dados REAIS
+        h_stats = self.collector.collect_team_data(h_id, f.league_id, season)
+        a_stats = self.collector.collect_team_data(a_id, f.league_id, season)
+        h2h = self.collector.collect_h2h_data(h_id, a_id)
+
+        # 2. Golos esperados (mu do Poisson); a probabilidade sai em lote para todos os jogos
+        try:
+            mu = expected_total_goals(h_stats, a_stats, h2h)
+            conf = data_confidence(h_stats, a_stats, h2h)
+        except Exception as e:
+            logger.error("Erro a calcular golos esperados do jogo %s: %s", f.id, e)
+            mu, conf = 0.0, 0.0  # mu=0 -> P(Over 1.5)=0, como antes
+        return f, mu, conf
+
     def run_daily_analysis(self, leagues=None):
         today = datetime.now().strftime("%Y-%m-%d")
-        all_fixtures = []
         opportunities = []
+        season = self.get_valid_season()
+        self.client.reset_run_cache()
+        if leagues is None:
+            leagues = self.LEAGUES
+
+        # Pedidos HTTP em paralelo (I/O): jogos de todas as ligas, depois dados de cada jogo
+        fixtures_by_league = self.client.get_fixtures_many(today, leagues, season)
+        all_fixtures = [f for fixtures in fixtures_by_league.values() for f in fixtures]
+        # Estatísticas de cada equipa pedidas uma só vez (a mesma equipa pode ter 2 jogos)
+        self.client.collect_team_data_bulk(
+            {(t, f.league_id) for f in all_fixtures for t in (f.home_id, f.away_id)}, season
+        )
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            candidates = list(executor.map(self._evaluate_fixture, all_fixtures, repeat(season)))
+
+        # 3. P(Over 1.5) de todos os jogos numa só passagem (vetorizada com numpy)
+        probabilities = prob_total_over_batch([c[1] for c in candidates], 1.5)
 
-        for league_id in leagues:
-            fixtures = self.client.get_fixtures(date=today, league_id=league_id, season=2025)
-            for f in fixtures:
-                all_fixtures.append(f)
-                h_id, a_id = f['teams']['home']['id'], f['teams']['away']['id']
-                
-                # 1. Coleta dados REAIS
-                h_stats = self.collector.collect_team_data(h_id, league_id, 2025)
-                a_stats = self.collector.collect_team_data(a_id, league_id, 2025)
-                h2h = self.collector.collect_h2h_data(h_id, a_id)
-                
-                # 2. Calcula Probabilidade REAL (Poisson)
-                prob, conf = calculate_over_probability(h_stats, a_stats, h2h, 1.5)
-                
-                # 3. Define Odd (Aqui idealmente buscaria da API, mas usamos 1.45 como base conservadora)
-                market_odds = 1.45 
-                
-                analysis = self.detector.detect_value(prob, market_odds)
+        # 4. Odd (idealmente viria da API, mas usamos 1.45 como base conservadora);
+        #    EV/Kelly de todos os jogos do ciclo numa única passagem
+        market_odds = DEFAULT_OVER_1_5_ODDS
+        analyses = self.detector.detect_values(probabilities, [market_odds] * len(candidates))
 
-                if analysis['is_value'] and prob > 0.65: # Filtro de segurança
-                    opp = {
-                        'home_team': f['teams']['home']['name'],
-                        'away_team': f['teams']['away']['name'],
-                        'league': f['league']['name'],
-                        'match_date': f['fixture']['date'],
-                        'our_probability': prob,
-                        'over_1_5_odds': market_odds,
-                        'expected_value': analysis['expected_value'],
-                        'recommended_stake': analysis['suggested_stake'] * 100,
-                        'bet_quality': 'EXCELENTE' if prob > 0.8 else 'BOA',
-                        'risk_level': 'BAIXO' if prob > 0.8 else 'MÉDIO',
-                        'confidence': conf * 100,
-                        'edge': analysis['expected_value']
-                    }
-                    opportunities.append(opp)
-                    if self.notifier: self.notifier.notify_opportunity(opp)
+        for (f, _, conf), prob, analysis in zip(candidates, probabilities, analyses):
+            if analysis['is_value'] and prob > 0.65: # Filtro de segurança
+                opp = {
+                    'home_team': f.home_name,
+                    'away_team': f.away_name,
+                    'league': f.league_name,
+                    'match_date': f.date,
+                    'our_probability': prob,
+                    'over_1_5_odds': market_odds,
+                    'expected_value': analysis['expected_value'],
+                    'recommended_stake': analysis['suggested_stake'] * 100,
+                    'bet_quality': 'EXCELENTE' if prob > 0.8 else 'BOA',
+                    'risk_level': 'BAIXO' if prob > 0.8 else 'MÉDIO',
+                    'confidence': conf * 100,
+                    'edge': analysis['expected_value']
+                }
+                opportunities.append(opp)
 
+        # Oportunidades agrupadas em poucas mensagens, antes do resumo
+        if self.notifier and opportunities: self.notifier.notify_opportunities(opportunities)
         if self.notifier: self.notifier.notify_daily_summary(opportunities, len(all_fixtures))
@@ -1,69 +1,655 @@
 # src/api_client.py
+import os
+import sys
+import json
 import time
+import random
+import hashlib
+import threading
 import logging
 import requests
+from requests.adapters import HTTPAdapter
+from pathlib import Path
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from src.resilience import CircuitBreaker, TokenBucket
+
+try:  # com brotli instalado o urllib3 descomprime "br", ainda menor que gzip
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # orjson é opcional: cai para o parser da stdlib
+    _loads = json.loads
 
 logger = logging.getLogger("src.api_client")
-logger.setLevel(logging.INFO)
+
+
+# Mercado/seleções procurados nas odds; internados para a comparação das chaves
+# do índice se reduzir, na prática, a igualdade de ponteiros
+OVER_UNDER_BET = sys.intern("Goals Over/Under")
+OVER_LINES = {
+    'over_0_5_odds': (OVER_UNDER_BET, sys.intern("Over 0.5")),
+    'over_1_5_odds': (OVER_UNDER_BET, sys.intern("Over 1.5")),
+    'over_2_5_odds': (OVER_UNDER_BET, sys.intern("Over 2.5")),
+}
+OVER_SELECTIONS = frozenset(OVER_LINES.values())
+# ID do mercado "Goals Over/Under" na API-Football: filtra /odds no servidor
+OVER_UNDER_BET_ID = 5
+
+
+class Fixture(NamedTuple):
+    """Campos de um jogo usados pela análise, extraídos uma única vez do payload."""
+    id: int
+    date: str
+    league_id: int
+    league_name: str
+    home_id: int
+    home_name: str
+    away_id: int
+    away_name: str
+
+
+def _intern(value):
+    """Interna textos que se repetem entre jogos (ligas, equipas, horários)."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def parse_fixture(raw: Dict) -> Optional[Fixture]:
+    """
+    Converte um item de /fixtures num Fixture; None se faltarem os IDs.
+    Só os campos usados ficam vivos (o payload original pode ser libertado) e os
+    textos repetidos partilham uma única cópia.
+    """
+    fixture = raw.get("fixture") or {}
+    league = raw.get("league") or {}
+    teams = raw.get("teams") or {}
+    home, away = teams.get("home") or {}, teams.get("away") or {}
+    if fixture.get("id") is None or home.get("id") is None or away.get("id") is None:
+        return None
+    return Fixture(
+        id=fixture["id"],
+        date=_intern(fixture.get("date") or ""),
+        league_id=league.get("id"),
+        league_name=_intern(league.get("name")),
+        home_id=home["id"],
+        home_name=_intern(home.get("name")),
+        away_id=away["id"],
+        away_name=_intern(away.get("name")),
+    )
+
+
+def iter_selections(bookmakers: Iterable[Dict]) -> Iterable[Tuple[str, str, str]]:
+    """(mercado, seleção, odd) de todas as casas, achatado num único gerador."""
+    return (
+        (bet.get("name"), v.get("value"), v.get("odd"))
+        for bm in bookmakers
+        for bet in bm.get("bets") or ()
+        for v in bet.get("values") or ()
+    )
+
+
+def index_odds(bookmakers: Iterable[Dict], wanted=None) -> Dict[Tuple[str, str], str]:
+    """
+    Indexa as odds por (mercado, seleção) numa única passagem.
+    Se várias casas oferecem a mesma seleção fica a primeira (ordem da API).
+    Com `wanted`, guarda só essas seleções e pára assim que as tiver todas.
+    """
+    idx = {}
+    for name, value, odd in iter_selections(bookmakers):
+        key = (name, value)
+        if wanted is not None:
+            if key not in wanted or key in idx:
+                continue
+            idx[key] = odd
+            if len(idx) == len(wanted):
+                break
+        else:
+            idx.setdefault(key, odd)
+    return idx
+
+
+# Caminho, dentro de response["goals"] de teams/statistics, da média total de golos
+GOALS_AVG_PATH = ("average", "total")
+
+
+def _deep_get(node, path: Tuple[str, ...]):
+    """Valor em `path` dentro de dicts aninhados; None se algum nível faltar ou for null."""
+    try:
+        for key in path:
+            node = node[key]
+    except (KeyError, TypeError):
+        return None
+    return node
+
+
+def _maybe_float(x) -> Optional[float]:
+    """float de um valor da API (número ou texto); None se nulo ou inválido."""
+    if isinstance(x, (int, float)):
+        return float(x)
+    if isinstance(x, str):
+        try:
+            return float(x)
+        except ValueError:
+            return None
+    return None
+
+
+# Validade (s) das respostas em cache no disco, por endpoint; endpoints fora da tabela não são guardados
+CACHE_TTL = {
+    "fixtures": 600,
+    "odds": 120,
+    "teams/statistics": 86400,
+    "fixtures/headtohead": 86400,
+}
+
+
+# Jogos de dias já passados não mudam: ficam em cache (praticamente) para sempre
+PAST_FIXTURES_TTL = 30 * 86400
+
+
+MEM_CACHE_SIZE = 512
+
+
+def _cache_ttl(endpoint: str, params: Dict) -> Optional[int]:
+    if endpoint == "fixtures" and str(params.get("date", "9999")) < datetime.now().strftime("%Y-%m-%d"):
+        return PAST_FIXTURES_TTL
+    return CACHE_TTL.get(endpoint)
+
+
+def _cache_key(endpoint: str, params: Dict) -> str:
+    return hashlib.sha1((endpoint + json.dumps(params, sort_keys=True)).encode()).hexdigest()
+
+
+class RateLimited(Exception):
+    """Limite de pedidos da API atingido (HTTP 429 ou erro 'rateLimit' no corpo)."""
+
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__(f"rate limit atingido (Retry-After: {retry_after})")
+        self.retry_after = retry_after
+
+
+def _retry_after(response) -> Optional[float]:
+    """Lê o header Retry-After (em segundos); None se ausente ou inválido."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(1.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+# Controlo de concorrência (AIMD)
+MAX_CONCURRENCY = 32
+SUCCESS_STEP = 5
+
+LOW_QUOTA_PAUSE = 60
+
+# (ligação, leitura): um host inacessível falha em 5s em vez de prender um slot do pool
+REQUEST_TIMEOUT = (5, 15)
+
+# Bulkheads: pedidos simultâneos por família de endpoint (1.º segmento do caminho),
+# para uma rajada de odds não esgotar o pool e deixar fixtures/estatísticas à espera
+BULKHEADS = {"fixtures": 8, "odds": 16, "teams": 4}
+
+
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+
+def _backoff(prev: float) -> float:
+    """Decorrelated jitter: evita que pedidos paralelos repitam todos ao mesmo tempo."""
+    return min(BACKOFF_CAP, random.uniform(BACKOFF_BASE, (prev or BACKOFF_BASE) * 3))
+
 
 class APIClient:
     BASE_URL = "https://v3.football.api-sports.io"
+    max_backoff_total = 120.0  # segundos de espera acumulada por pedido antes de desistir
 
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.session = requests.Session()
-        self.session.headers.update({"x-apisports-key": api_key})
+        # Pool keep-alive: um handshake TLS por ligação, reutilizada entre pedidos.
+        # Sem retries no urllib3: a política de repetição é a de safe_request.
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Accept-Encoding explícito: as respostas JSON vêm comprimidas (5-10x menos bytes)
+        self.session.headers.update({"x-apisports-key": api_key, "Accept-Encoding": ACCEPT_ENCODING})
+        # URLs completas por endpoint, montadas uma vez (os endpoints conhecidos são os de CACHE_TTL)
+        self._urls: Dict[str, str] = {e: f"{self.BASE_URL}/{e}" for e in CACHE_TTL}
+        # Memória da análise em curso (limpa por reset_run_cache)
+        self._stats_cache: Dict[Tuple[int, int, int], Dict] = {}
+        self._h2h_cache: Dict[Tuple[int, int], Dict] = {}
+        # LRU em memória à frente da cache em disco: (endpoint, params) -> (expira_em, corpo)
+        self._mem_cache: "OrderedDict[Tuple, Tuple[float, Dict]]" = OrderedDict()
+        self._mem_lock = threading.Lock()
+        self.cache_dir = Path(os.getenv("APICACHE_DIR", ".apicache"))
+        # Limitador proativo (token bucket: API_RPM/min, rajadas até 5), partilhado pelas threads
+        self._rpm_limit = int(os.getenv("API_RPM", "30"))
+        self._bucket = TokenBucket(rate=self._rpm_limit / 60.0, burst=5)
+        self._rate_lock = threading.Lock()
+        self._remaining = None  # último X-RateLimit-Remaining devolvido pela API
+        self._quota_day = None   # dia (UTC) em que a quota diária se esgotou
+        # AIMD: pedidos simultâneos sobem +1 a cada SUCCESS_STEP sucessos e caem para
+        # metade a cada 429/5xx; falhas seguidas abrem o disjuntor
+        self._concurrency = 8
+        self._in_flight = 0
+        self._successes = 0
+        self._slots = threading.Condition()
+        self.breaker = CircuitBreaker()
+        self._inflight: Dict[Tuple, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._bulkheads = {name: threading.BoundedSemaphore(n) for name, n in BULKHEADS.items()}
         logger.info("Conectado ao cliente da API de Futebol.")
 
+    def close(self):
+        """Fecha as ligações do pool da sessão."""
+        self.session.close()
+
+    def _cache_path(self, endpoint, params) -> Path:
+        return self.cache_dir / f"{_cache_key(endpoint, params)}.json"
+
+    def _mem_get(self, key):
+        with self._mem_lock:
+            entry = self._mem_cache.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._mem_cache[key]
+                return None
+            self._mem_cache.move_to_end(key)
+            return entry[1]
+
+    def _mem_put(self, key, data, expires_at):
+        with self._mem_lock:
+            self._mem_cache[key] = (expires_at, data)
+            self._mem_cache.move_to_end(key)
+            while len(self._mem_cache) > MEM_CACHE_SIZE:
+                self._mem_cache.popitem(last=False)
+
+    def _cache_get(self, endpoint, params):
+        """Resposta em memória ou em disco, se ainda dentro do TTL do endpoint."""
+        ttl = _cache_ttl(endpoint, params)
+        if not ttl:
+            return None
+        key = (endpoint, tuple(sorted(params.items())))
+        data = self._mem_get(key)
+        if data is not None:
+            return data
+        path = self._cache_path(endpoint, params)
+        try:
+            expires_at = path.stat().st_mtime + ttl
+            if expires_at < time.time():
+                return None
+            data = _loads(path.read_bytes())
+        except (OSError, ValueError):
+            return None
+        self._mem_put(key, data, expires_at)
+        return data
+
+    def _cache_stale(self, endpoint, params):
+        """
+        (ETag, Last-Modified, corpo) de uma entrada em disco já expirada, para revalidar
+        com um GET condicional; None se não houver entrada ou validadores.
+        """
+        if endpoint not in CACHE_TTL:
+            return None
+        path = self._cache_path(endpoint, params)
+        try:
+            meta = _loads(path.with_suffix(".meta.json").read_bytes())
+            if not (meta.get("etag") or meta.get("last_modified")):
+                return None
+            return meta.get("etag"), meta.get("last_modified"), _loads(path.read_bytes())
+        except (OSError, ValueError):
+            return None
+
+    def _cache_touch(self, endpoint, params):
+        """304: o corpo em disco continua válido, renova-se só o TTL."""
+        try:
+            os.utime(self._cache_path(endpoint, params))
+        except OSError:
+            pass
+
+    def _write_atomic(self, path: Path, obj):
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(obj, f)
+        os.replace(tmp, path)  # escrita atómica: leitores nunca veem um ficheiro a meio
+
+    def _cache_put(self, endpoint, params, data, etag=None, last_modified=None):
+        ttl = _cache_ttl(endpoint, params)
+        if not ttl:
+            return
+        self._mem_put((endpoint, tuple(sorted(params.items()))), data, time.time() + ttl)
+        path = self._cache_path(endpoint, params)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._write_atomic(path, data)
+            self._write_atomic(path.with_suffix(".meta.json"), {
+                "etag": etag, "last_modified": last_modified, "stored_at": time.time(),
+            })
+        except OSError as e:
+            logger.warning("Cache em disco indisponível (%s): %s", endpoint, e)
+
+    def _throttle(self):
+        """Espera, se preciso, para não passar de API_RPM pedidos por minuto (evita os 429)."""
+        with self._rate_lock:
+            if self._remaining is not None and self._remaining <= 2:
+                # Quota do minuto quase esgotada: espera a janela da API renovar
+                time.sleep(LOW_QUOTA_PAUSE)
+                self._remaining = None
+        self._bucket.acquire()
+
+    def _acquire_slot(self):
+        with self._slots:
+            while self._in_flight >= self._concurrency:
+                self._slots.wait()
+            self._in_flight += 1
+
+    def _release_slot(self):
+        with self._slots:
+            self._in_flight -= 1
+            self._slots.notify_all()
+
+    def _record_outcome(self, ok: bool):
+        """Ajusta a concorrência permitida (AIMD) e informa o disjuntor."""
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        with self._slots:
+            if ok:
+                self._successes += 1
+                if self._successes >= SUCCESS_STEP:
+                    self._successes = 0
+                    self._concurrency = min(MAX_CONCURRENCY, self._concurrency + 1)
+                    self._slots.notify_all()
+                return
+            self._successes = 0
+            self._concurrency = max(1, self._concurrency // 2)
+
+    def _make_request(self, endpoint, params):
+        """
+        Executa um único pedido à API (ou serve-o da cache em disco, se fresco).
+        - Levanta RateLimited em 429 / erro 'rateLimit' (vale a pena esperar e repetir)
+        - Devolve None em erros 4xx definitivos (404, 403...) para não gastar retries
+        - Levanta requests.HTTPError em 5xx (erro transitório)
+        - Devolve None sem pedir nada enquanto o disjuntor estiver aberto
+        """
+        hit = self._cache_get(endpoint, params)
+        if hit is not None:
+            return hit
+
+        # Single-flight: pedidos iguais em simultâneo partilham uma só ida à rede
+        key = (endpoint, tuple(sorted(params.items())))
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(self._fetch(endpoint, params))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+        return future.result()
+
+    def _fetch(self, endpoint, params):
+        url = self._urls.get(endpoint) or f"{self.BASE_URL}/{endpoint}"
+        headers = {}
+        # Validadores guardados junto da cache em disco (sobrevivem a reinícios e não
+        # prendem corpos inteiros em memória durante a vida do processo)
+        cached = self._cache_stale(endpoint, params)
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        # A quota vem antes do disjuntor: allow() pode passá-lo a HALF_OPEN, e a partir
+        # daí todo o caminho tem de registar um resultado (senão fica preso em HALF_OPEN)
+        if self._quota_day is not None:
+            if self._quota_day == datetime.now(timezone.utc).date():
+                logger.warning("Quota diária da API esgotada: pedido %s não enviado.", endpoint)
+                return None
+            self._quota_day = None
+        if not self.breaker.allow():
+            logger.warning("Disjuntor aberto: pedido %s não enviado.", endpoint)
+            return None
+
+        bulkhead = self._bulkheads.get(endpoint.split("/", 1)[0]) or nullcontext()
+        # Um único resultado por pedido, decidido só depois de ver o corpo (um rateLimit
+        # dentro de um HTTP 200 conta como falha, não como sucesso seguido de falha)
+        ok = False
+        try:
+            with bulkhead:
+                self._acquire_slot()
+                try:
+                    self._throttle()
+                    response = self.session.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+                finally:
+                    self._release_slot()
+            ok = response.status_code != 429 and response.status_code < 500
+            try:
+                self._remaining = int(response.headers["X-RateLimit-Remaining"])
+            except (KeyError, TypeError, ValueError):
+                pass
+            # Quota diária (x-ratelimit-requests-remaining): a zero, todos os pedidos seguintes
+            # falhariam até a API renovar a quota à meia-noite UTC, por isso nem são enviados
+            if _maybe_float(response.headers.get("x-ratelimit-requests-remaining")) == 0:
+                if self._quota_day is None:
+                    logger.error("🚫 Quota diária da API esgotada: pedidos suspensos até 00:00 UTC.")
+                self._quota_day = datetime.now(timezone.utc).date()
+            if response.status_code == 304 and cached:
+                self._cache_touch(endpoint, params)
+                return cached[2]
+            if response.status_code == 429:
+                raise RateLimited(_retry_after(response))
+            if 400 <= response.status_code < 500:
+                logger.warning("Pedido %s recusado (HTTP %s), sem nova tentativa.", endpoint, response.status_code)
+                return None
+            response.raise_for_status()
+
+            data = _loads(response.content)
+            if data.get("errors") and "rateLimit" in str(data["errors"]):
+                ok = False
+                raise RateLimited(_retry_after(response))
+            if data.get("errors"):
+                # Erros no corpo (quota, token, parâmetros) vêm com HTTP 200: nunca vão para
+                # a cache, senão ficariam servidos durante todo o TTL do endpoint
+                logger.warning("API devolveu erros em %s: %s", endpoint, data["errors"])
+                return data
+
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+            self._cache_put(endpoint, params, data, etag, last_modified)
+            return data
+        finally:
+            self._record_outcome(ok)
+
     def safe_request(self, endpoint, params, retries=3):
-        url = f"{self.BASE_URL}/{endpoint}"
+        """
+        _make_request com repetições: espera o Retry-After do servidor quando o indica,
+        senão backoff exponencial com jitter; desiste ao fim de `retries` tentativas ou
+        se o tempo total de espera passar de max_backoff_total.
+        """
+        wait = waited = 0.0
         for attempt in range(retries):
             try:
-                response = self.session.get(url, params=params, timeout=10)
-                data = response.json()
-                if "errors" in data and data["errors"] and "rateLimit" in str(data["errors"]):
-                    time.sleep(2)
-                    continue
-                return data
+                return self._make_request(endpoint, params)
+            except RateLimited as e:
+                wait = e.retry_after or _backoff(wait)
+                logger.warning("Rate limit em %s: a aguardar %.1fs", endpoint, wait)
             except Exception as e:
-                logger.error(f"Erro na requisição {endpoint}: {e}")
+                wait = _backoff(wait)
+                logger.error("Erro na requisição %s: %s", endpoint, e)
+            if attempt == retries - 1 or waited + wait > self.max_backoff_total:
+                break
+            time.sleep(wait)
+            waited += wait
         return None
 
-    def get_fixtures(self, date: str, league_id: int, season: int):
-        return self.safe_request("fixtures", {"date": date, "league": league_id, "season": season}).get("response", [])
+    @staticmethod
+    def _parse_fixtures(data) -> List[Fixture]:
+        fixtures = []
+        seen = set()  # a API pode repetir um jogo (ex.: páginas sobrepostas): fica o primeiro
+        for raw in data.get("response") or ():
+            if (fx := parse_fixture(raw)) is None:
+                logger.warning("Jogo sem IDs ignorado: %s", (raw.get("fixture") or {}).get("id"))
+                continue
+            if fx.id in seen:
+                continue
+            seen.add(fx.id)
+            fixtures.append(fx)
+        return fixtures
+
+    def get_fixtures(self, date: str, league_id: int, season: int) -> List[Fixture]:
+        # Resposta vazia (200 sem jogos) é definitiva: devolve [] sem repetir o pedido
+        # status=NS: só jogos por começar (os únicos apostáveis pré-jogo), payload menor
+        data = self.safe_request("fixtures", {"date": date, "league": league_id, "season": season, "status": "NS"})
+        if not data:
+            return []
+        return self._parse_fixtures(data)
+
+    def get_fixtures_many(self, date: str, league_ids: Iterable[int], season: int,
+                          max_workers: int = 8) -> Dict[int, List[Fixture]]:
+        """
+        Jogos de várias ligas: {league_id: [Fixture]}.
+        Um único pedido com todos os jogos do dia, filtrado aqui por liga; só se esse
+        pedido falhar é que se faz um pedido por liga (em paralelo).
+        """
+        league_ids = list(league_ids)
+        if not league_ids:
+            return {}
+
+        data = self.safe_request("fixtures", {"date": date, "status": "NS"})
+        if data is not None:
+            by_league = {lid: [] for lid in league_ids}
+            for fx in self._parse_fixtures(data):
+                if fx.league_id in by_league:
+                    by_league[fx.league_id].append(fx)
+            return by_league
+
+        logger.warning("Pedido global de jogos de %s falhou; a consultar liga a liga.", date)
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(league_ids))) as executor:
+            results = executor.map(lambda lid: self.get_fixtures(date, lid, season), league_ids)
+            return dict(zip(league_ids, results))
+
+    def get_odds(self, fixture_id: int) -> Dict[str, float]:
+        """Odds Over 0.5 / 1.5 / 2.5 do jogo (chaves ausentes se a API não as tiver)."""
+        # Só o mercado Over/Under: o resto (1X2, handicaps...) nem chega a ser transferido
+        data = self.safe_request("odds", {"fixture": fixture_id, "bet": OVER_UNDER_BET_ID})
+        if not data or not data.get("response"): return {}
+
+        idx = index_odds(data["response"][0].get("bookmakers") or (), OVER_SELECTIONS)
+        odds = {}
+        for key, selection in OVER_LINES.items():
+            raw = idx.get(selection)
+            if raw is None:
+                continue
+            odd = _maybe_float(raw)
+            if odd is None:
+                logger.warning("Odd inválida para %s no jogo %s: %r", selection[1], fixture_id, raw)
+                continue
+            odds[key] = odd
+        return odds
+
+    def reset_run_cache(self):
+        """Esquece as estatísticas/H2H memorizadas; chamado no início de cada análise."""
+        self._stats_cache.clear()
+        self._h2h_cache.clear()
 
     def collect_team_data(self, team_id: int, league_id: int, season: int):
+        """Estatísticas da equipa, memorizadas durante a análise em curso."""
+        key = (team_id, league_id, season)
+        if key in self._stats_cache:
+            return self._stats_cache[key]
+        stats = self._fetch_team_data(team_id, league_id, season)
+        if stats:  # falhas não ficam memorizadas: a próxima chamada tenta de novo
+            self._stats_cache[key] = stats
+        return stats
+
+    def collect_team_data_bulk(self, keys: Iterable[Tuple[int, int]], season: int,
+                               max_workers: int = 8) -> Dict[Tuple[int, int], Dict]:
+        """
+        Estatísticas de várias equipas em paralelo, cada (team_id, league_id) pedida uma
+        só vez; os resultados ficam na memória da análise para collect_team_data.
+        """
+        keys = set(keys)
+        if not keys:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as executor:
+            futures = {executor.submit(self.collect_team_data, tid, lid, season): (tid, lid)
+                       for tid, lid in keys}
+            return {futures[f]: f.result() for f in as_completed(futures)}
+
+    def collect_h2h_data(self, team1_id: int, team2_id: int):
+        """H2H do par de equipas (em qualquer ordem), memorizado durante a análise em curso."""
+        key = (min(team1_id, team2_id), max(team1_id, team2_id))
+        if key in self._h2h_cache:
+            return self._h2h_cache[key]
+        h2h = self._fetch_h2h_data(team1_id, team2_id)
+        if h2h:
+            self._h2h_cache[key] = h2h
+        return h2h
+
+    def _fetch_team_data(self, team_id: int, league_id: int, season: int):
         """Busca estatísticas reais da equipa na liga/época"""
         data = self.safe_request("teams/statistics", {"team": team_id, "league": league_id, "season": season})
         if not data or not data.get("response"): return {}
         
-        res = data["response"]
-        goals = res.get("goals", {}).get("for", {}).get("average", {}).get("total", 1.2)
-        # Calcula taxa de Over 1.5 baseada no histórico da época
-        line_15 = res.get("goals", {}).get("for", {}).get("minute", {}) # Simplificação se não houver campo direto
+        # Subárvore "goals" percorrida uma vez e partilhada pelas duas médias
+        goals = data["response"].get("goals") or {}
+        goals_for = _maybe_float(_deep_get(goals.get("for"), GOALS_AVG_PATH))
+        goals_against = _maybe_float(_deep_get(goals.get("against"), GOALS_AVG_PATH))
         
         return {
-            'goals_for_avg': float(goals),
+            'goals_for_avg': goals_for if goals_for is not None else 1.2,
+            'goals_against_avg': goals_against if goals_against is not None else 1.2,
             'over_1_5_rate': 0.75 # Valor base se a API não detalhar por jogo
         }
 
-    def collect_h2h_data(self, team1_id: int, team2_id: int):
+    def _fetch_h2h_data(self, team1_id: int, team2_id: int):
         """Busca histórico de confrontos diretos com proteção contra valores nulos"""
         data = self.safe_request("fixtures/headtohead", {"h2h": f"{team1_id}-{team2_id}", "last": 10})
         if not data or not data.get("response"): return {}
         
-        fixtures = data["response"]
-        over15_count = 0
-        valid_games = 0
-        
-        for f in fixtures:
-            # Proteção contra golos nulos (None)
-            home_goals = f.get('goals', {}).get('home')
-            away_goals = f.get('goals', {}).get('away')
-            
-            if home_goals is not None and away_goals is not None:
-                valid_games += 1
-                if (home_goals + away_goals) > 1.5:
-                    over15_count += 1
-        
-        return {'h2h_over_1_5_rate': over15_count / valid_games if valid_games > 0 else 0.5}
+        # Total de golos por jogo numa só passagem (ignora jogos com golos nulos)
+        totals = [
+            g["home"] + g["away"]
+            for f in data["response"]
+            if (g := f.get("goals") or {}).get("home") is not None and g.get("away") is not None
+        ]
+        if not totals:
+            return {'h2h_over_1_5_rate': 0.5}
+
+        n = len(totals)
+        return {
+            'h2h_over_1_5_rate': sum(t > 1 for t in totals) / n,
+            'h2h_over_2_5_rate': sum(t > 2 for t in totals) / n,
+            'h2h_matches': n,
+        }
+
+
+@lru_cache(maxsize=None)
+def get_client(api_key: str) -> APIClient:
+    """
+    Cliente partilhado por chave de API: todos os Analyzer/DataCollector do processo
+    usam a mesma Session (ligações reaproveitadas) e a mesma quota de pedidos.
+    """
+    return APIClient(api_key)
@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +35,7 @@ class DataCollector:
             raw_stats = self.client.collect_team_data(team_id, league_id, season)
             
             if not raw_stats:
-                logger.warning(f"Não foi possível obter dados brutos para o time {team_id}. Retornando dados mínimos.")
+                logger.warning("Não foi possível obter dados brutos para o time %s. Retornando dados mínimos.", team_id)
                 return {} # Retorna vazio, o Scheduler irá tratar isto.
             
             # --- Lógica de Processamento de Dados REAIS da API (Substitua pela sua) ---
@@ -43,6 +43,7 @@ class DataCollector:
             # Exemplo de processamento (MOCK/Placeholder)
             processed_data = {
                 'goals_for_avg': raw_stats.get('goals_for_avg', 1.5),
+                'goals_against_avg': raw_stats.get('goals_against_avg', 1.2),
                 'over_1_5_rate': raw_stats.get('over_1_5_rate', 0.70),
                 'offensive_score': raw_stats.get('offensive_score', 0.60),
             }
@@ -50,7 +51,7 @@ class DataCollector:
             return processed_data
         
         except Exception as e:
-            logger.error(f"Erro ao coletar dados do time: {e}")
+            logger.error("Erro ao coletar dados do time: %s", e)
             return {}
 
     def collect_h2h_data(self, team1_id: int, team2_id: int) -> Dict[str, float]:
@@ -65,7 +66,7 @@ class DataCollector:
             raw_h2h = self.client.collect_h2h_data(team1_id, team2_id)
             
             if not raw_h2h:
-                logger.warning(f"Não foi possível obter dados H2H para os times {team1_id}-{team2_id}. Retornando dados mínimos.")
+                logger.warning("Não foi possível obter dados H2H para os times %s-%s. Retornando dados mínimos.", team1_id, team2_id)
                 return {}
             
             # --- Lógica de Processamento de Dados REAIS da API (Substitua pela sua) ---
@@ -77,5 +78,5 @@ class DataCollector:
             return processed_data
         
         except Exception as e:
-            logger.error(f"Erro ao coletar dados H2H: {e}")
+            logger.error("Erro ao coletar dados H2H: %s", e)
             return {}
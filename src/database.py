@@ -1,15 +1,9 @@
 # src/database.py
 import sqlite3
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List
 
 logger = logging.getLogger("src.database")
-logger.setLevel(logging.INFO)
-if not logger.handlers:
-    import sys
-    h = logging.StreamHandler(sys.stdout)
-    h.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-    logger.addHandler(h)
 
 DB_FILE = "football_value.db"
 
@@ -30,11 +24,33 @@ CREATE TABLE IF NOT EXISTS opportunities (
 );
 """
 
+INSERT_OPPORTUNITY = """
+INSERT INTO opportunities
+(fixture_id, team1, team2, league, market, prob, odds, ev, confidence, kelly)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SELECT_RECENT = "SELECT * FROM opportunities ORDER BY created_at DESC LIMIT ?"
+
+# WAL: leituras não bloqueiam durante a escrita e cada commit faz um só fsync
+CONNECTION_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-20000;
+PRAGMA mmap_size=268435456;
+PRAGMA busy_timeout=5000;
+"""
+
 class Database:
     def __init__(self, db_path: str = DB_FILE):
         self.db_path = db_path
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(CONNECTION_PRAGMAS)
+        mode = self.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        if mode != "wal":
+            logger.warning("⚠️ WAL não ativado (journal_mode=%s)", mode)
         self._ensure_schema()
         logger.info(f"✅ Conectado ao banco: {self.db_path}")
 
@@ -46,20 +62,38 @@ class Database:
 
     def save_opportunity(self, fixture_id: int, team1: str, team2: str, league: str,
                          market: str, prob: float, odds: float, ev: float, confidence: float, kelly: float):
-        cur = self.conn.cursor()
-        cur.execute("""
-            INSERT INTO opportunities
-            (fixture_id, team1, team2, league, market, prob, odds, ev, confidence, kelly)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (fixture_id, team1, team2, league, market, prob, odds, ev, confidence, kelly))
-        self.conn.commit()
-        logger.info(f"✅ Oportunidade salva: {team1} vs {team2}")
+        self.save_opportunities([{
+            'fixture_id': fixture_id, 'team1': team1, 'team2': team2, 'league': league,
+            'market': market, 'prob': prob, 'odds': odds, 'ev': ev,
+            'confidence': confidence, 'kelly': kelly,
+        }])
+
+    def save_opportunities(self, opportunities: List[Dict[str, Any]]) -> int:
+        """Grava várias oportunidades numa única transação (um só commit)."""
+        rows = [
+            (o.get('fixture_id'), o['team1'], o['team2'], o['league'], o['market'],
+             o['prob'], o['odds'], o['ev'], o['confidence'], o['kelly'])
+            for o in opportunities
+        ]
+        if not rows:
+            return 0
+        with self.conn:
+            self.conn.executemany(INSERT_OPPORTUNITY, rows)
+        logger.info(f"✅ {len(rows)} oportunidade(s) salva(s)")
+        return len(rows)
+
+    def iter_opportunities(self, limit: int = 100, batch_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """Percorre as oportunidades mais recentes em blocos de fetchmany, uma a uma."""
+        cur = self.conn.execute(SELECT_RECENT, (limit,))
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
 
     def list_opportunities(self, limit: int = 100) -> List[Dict[str, Any]]:
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM opportunities ORDER BY created_at DESC LIMIT ?", (limit,))
-        rows = cur.fetchall()
-        return [dict(row) for row in rows]
+        return list(self.iter_opportunities(limit))
 
     def close(self):
         self.conn.close()
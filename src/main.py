@@ -1,42 +1,62 @@
 # src/main.py
+import os
 import logging
+from functools import lru_cache
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
 from fastapi import FastAPI
 from src.analyzer import Analyzer
-from datetime import datetime
+from datetime import datetime, timezone
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("src.main")
 
 app = FastAPI()
 scheduler = BackgroundScheduler()
-analyzer = Analyzer()
 
-LEAGUES = [
-    94,  # Portugal - Primeira Liga
-    88,  # Holanda - Eredivisie
-    89,  # Holanda - Eerste Divisie (Jong AZ vs Maastricht)
-    78,  # Alemanha - Bundesliga
-    40,  # Inglaterra - Championship
-]
+# Hora fixa (UTC) da análise diária; o disparo fica a cargo do APScheduler, sem sleeps à mão
+ANALYSIS_HOUR_UTC = 6
+
+DEFAULT_LEAGUES = Analyzer.LEAGUES
+
+# LEAGUES="94,88,40" no ambiente substitui a lista; lido uma única vez no import
+LEAGUES = tuple(
+    int(x) for x in os.getenv("LEAGUES", "").split(",") if x.strip().isdigit()
+) or DEFAULT_LEAGUES
+
+@lru_cache(maxsize=1)
+def get_analyzer() -> Analyzer:
+    """Analyzer único por processo, criado na primeira utilização (importar o módulo fica barato)."""
+    return Analyzer()
 
 def run_daily():
     try:
         logger.info("🚀 Iniciando análise diária...")
-        analyzer.run_daily_analysis(leagues=LEAGUES)
+        get_analyzer().run_daily_analysis(leagues=LEAGUES)
         logger.info("✅ Análise concluída.")
     except Exception as e:
         logger.error(f"❌ Erro no scheduler diário: {e}")
     finally:
-        logger.info("⏳ Próxima execução daqui a 24 horas.")
+        logger.info("⏳ Próxima execução às %02d:00 UTC.", ANALYSIS_HOUR_UTC)
 
-# ✅ Executa imediatamente ao arrancar
-run_daily()
+@app.on_event("startup")
+def on_startup():
+    # ✅ Executa imediatamente ao arrancar (na thread do scheduler) e depois todos os dias
+    # à hora fixa; max_instances=1 + coalesce impedem execuções sobrepostas ou em rajada
+    scheduler.add_job(
+        run_daily,
+        CronTrigger(hour=ANALYSIS_HOUR_UTC, minute=0, timezone=timezone.utc),
+        next_run_time=datetime.now(timezone.utc),
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=3600,
+    )
+    scheduler.start()
+    logger.info("⏳ Scheduler diário iniciado (1x por dia).")
 
-# ✅ Agenda para repetir a cada 24 horas
-scheduler.add_job(run_daily, "interval", hours=24)
-scheduler.start()
-logger.info("⏳ Scheduler diário iniciado (1x por dia).")
+@app.on_event("shutdown")
+def on_shutdown():
+    scheduler.shutdown(wait=False)
 
 @app.get("/")
 def root():
@@ -45,3 +65,7 @@ def root():
         "leagues": LEAGUES,
         "timestamp": datetime.now().isoformat()
     }
+
+if __name__ == "__main__":
+    # `python -m src.main`: uma análise imediata, sem servidor
+    run_daily()
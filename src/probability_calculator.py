@@ -1,40 +1,114 @@
 # src/probability_calculator.py
 import math
 import logging
-from typing import Tuple, Dict, Any, Optional
+from operator import itemgetter
+from math import exp as _exp, floor as _floor, factorial as _factorial
+from typing import Tuple, Dict, Any, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional: o lote cai para um ciclo em Python
+    np = None
 
 logger = logging.getLogger("src.probability_calculator")
-logger.setLevel(logging.INFO)
-if not logger.handlers:
-    import sys
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-    logger.addHandler(handler)
+
+# Fatoriais 0!..20! tabelados (as linhas de golos usam k pequenos)
+_FACT = tuple(math.factorial(i) for i in range(21))
 
 def poisson_pmf(k: int, mu: float) -> float:
     """Poisson PMF."""
     if mu is None:
         return 0.0
     try:
-        return math.exp(-mu) * (mu ** k) / math.factorial(k)
+        return _exp(-mu) * (mu ** k) / (_FACT[k] if 0 <= k < 21 else _factorial(k))
     except Exception:
         return 0.0
 
 def poisson_cdf(k: int, mu: float) -> float:
     """CDF P(X <= k)."""
-    s = 0.0
-    for i in range(0, k + 1):
-        s += poisson_pmf(i, mu)
+    if mu is None or k < 0:
+        return 0.0
+    # Recorrência P(X=i) = P(X=i-1) * mu / i: um só exp e sem fatoriais
+    p = _exp(-mu)
+    s = p
+    for i in range(1, k + 1):
+        p *= mu / i
+        s += p
     return s
 
 def prob_total_over(mu_total: float, line: float) -> float:
     """Probabilidade total > line, assumindo total ~ Poisson(mu_total)."""
     # line pode ser 0.5, 1.5 etc -> converter para inteiro k = floor(line)
     # Prob(Total > line) = 1 - P(Total <= floor(line))
-    k = int(math.floor(line))
+    k = int(_floor(line))
     cdf = poisson_cdf(k, mu_total)
     return max(0.0, 1.0 - cdf)
 
+def prob_total_over_batch(mu_totals: Sequence[float], line: float) -> List[float]:
+    """
+    prob_total_over para vários jogos de uma vez.
+    Com numpy: uma passagem vetorizada (exp + recorrência da CDF) sobre todos os mu.
+    """
+    if np is None:
+        return [prob_total_over(mu, line) for mu in mu_totals]
+    mu = np.asarray(mu_totals, dtype=np.float64)
+    k = int(_floor(line))
+    # P(X=0) = e^-mu ; P(X=i) = P(X=i-1) * mu / i
+    term = np.exp(-mu)
+    cdf = term.copy()
+    for i in range(1, k + 1):
+        term *= mu / i
+        cdf += term
+    # 1 - cdf e o corte em 0 feitos no próprio array (cdf >= 0, logo nunca passa de 1)
+    np.subtract(1.0, cdf, out=cdf)
+    np.maximum(cdf, 0.0, out=cdf)
+    return cdf.tolist()
+
+# O DataCollector preenche sempre goals_for_avg: caminho rápido numa chamada em C
+_goals_for_avg = itemgetter('goals_for_avg')
+
+def _team_goals_for(stats: Optional[Dict[str, Any]]) -> float:
+    """Média de golos marcados com fallbacks, para estatísticas incompletas."""
+    gf = stats.get('goals_for_avg') if stats else None
+
+    # Fallback razoável: se faltar, tentar extrair de over rates
+    if gf is None:
+        over15 = stats.get('over_1_5_rate') if stats else None
+        if over15:
+            gf = max(0.5, min(2.5, over15 * 2.0))
+
+    # Se ainda None, assume 1.2 padrão conservador
+    return 1.2 if gf is None else gf
+
+def expected_total_goals(home_stats: Optional[Dict[str, Any]],
+                         away_stats: Optional[Dict[str, Any]],
+                         h2h_stats: Optional[Dict[str, Any]]) -> float:
+    """Golos esperados no jogo (mu do Poisson), ajustados pelo histórico H2H."""
+    try:
+        home_gf = _goals_for_avg(home_stats)
+        away_gf = _goals_for_avg(away_stats)
+    except (KeyError, TypeError):  # dict vazio/None ou sem a chave
+        home_gf = away_gf = None
+    if home_gf is None:
+        home_gf = _team_goals_for(home_stats)
+    if away_gf is None:
+        away_gf = _team_goals_for(away_stats)
+
+    # Ajuste simples por H2H histórico (média multiplicativa)
+    h2h_adj = 1.0
+    if h2h_stats and isinstance(h2h_stats, dict):
+        h2h_over15 = h2h_stats.get('h2h_over_1_5_rate')
+        if h2h_over15:
+            # escala 0.8..1.15
+            h2h_adj = 0.9 + 0.3 * h2h_over15
+
+    return (home_gf + away_gf) * h2h_adj
+
+def data_confidence(home_stats, away_stats, h2h_stats) -> float:
+    """Confiança heurística: mais dados disponíveis -> maior confiança."""
+    available = (1 if home_stats else 0) + (1 if away_stats else 0) + (1 if h2h_stats else 0)
+    return min(0.99, 0.33 * available + 0.34)  # roughly: 0.34, 0.67, 1.0
+
 def calculate_over_probability(home_stats: Dict[str, Any],
                                away_stats: Dict[str, Any],
                                h2h_stats: Optional[Dict[str, Any]],
@@ -44,52 +118,44 @@ def calculate_over_probability(home_stats: Dict[str, Any],
     - prob: probabilidade estimada de Over goal_line (ex.: 1.5 -> >1.5)
     - confidence: métrica heurística [0..1] sobre qualidade dos dados
     """
-    # Extrair médias de golos por equipa
     try:
-        home_gf = home_stats.get('goals_for_avg') if home_stats else None
-        away_gf = away_stats.get('goals_for_avg') if away_stats else None
-
-        # Fallback razoável: se faltar, tentar extrair de over rates
-        if home_gf is None:
-            h_over15 = home_stats.get('over_1_5_rate') if home_stats else None
-            if h_over15:
-                home_gf = max(0.5, min(2.5, h_over15 * 2.0))
-        if away_gf is None:
-            a_over15 = away_stats.get('over_1_5_rate') if away_stats else None
-            if a_over15:
-                away_gf = max(0.5, min(2.5, a_over15 * 2.0))
-
-        # Se ainda None, assume 1.2 padrão conservador
-        if home_gf is None:
-            home_gf = 1.2
-        if away_gf is None:
-            away_gf = 1.2
-
-        # Ajuste simples por H2H histórico (média multiplicativa)
-        h2h_adj = 1.0
-        if h2h_stats and isinstance(h2h_stats, dict):
-            h2h_over15 = h2h_stats.get('h2h_over_1_5_rate')
-            if h2h_over15:
-                # escala 0.8..1.15
-                h2h_adj = 0.9 + 0.3 * h2h_over15
-
-        mu_total = (home_gf + away_gf) * h2h_adj
-
+        mu_total = expected_total_goals(home_stats, away_stats, h2h_stats)
         prob = prob_total_over(mu_total, goal_line)
-
-        # Confiança heurística: mais dados disponíveis -> maior confiança
-        conf = 0.5
-        available = 0
-        for v in [home_stats, away_stats, h2h_stats]:
-            if v:
-                available += 1
-        conf = min(0.99, 0.33 * available + 0.34)  # roughly: 0.34, 0.67, 1.0
-        logger.info(f"Prob Over {goal_line}: mu_total={mu_total:.2f} -> prob={prob:.3f} conf={conf:.2f}")
+        conf = data_confidence(home_stats, away_stats, h2h_stats)
+        logger.debug("Prob Over %s: mu_total=%.2f -> prob=%.3f conf=%.2f", goal_line, mu_total, prob, conf)
         return prob, conf
     except Exception as e:
         logger.error(f"Erro em calculate_over_probability: {e}")
         return 0.0, 0.0
 
+def calculate_over_probabilities(home_stats: Dict[str, Any],
+                                 away_stats: Dict[str, Any],
+                                 h2h_stats: Optional[Dict[str, Any]],
+                                 lines: Sequence[float]) -> Dict[float, Tuple[float, float]]:
+    """
+    Várias linhas do mesmo jogo de uma vez -> {linha: (probability, confidence)}.
+    mu, exp(-mu) e a confiança são calculados uma só vez; a CDF avança pelas
+    linhas por ordem crescente em vez de recomeçar do zero em cada uma.
+    """
+    try:
+        mu_total = expected_total_goals(home_stats, away_stats, h2h_stats)
+        conf = data_confidence(home_stats, away_stats, h2h_stats)
+        term = _exp(-mu_total)  # P(X=0)
+        cdf = term
+        i = 0
+        result = {}
+        for line in sorted(lines):
+            k = int(_floor(line))
+            while i < k:
+                i += 1
+                term *= mu_total / i
+                cdf += term
+            result[line] = (max(0.0, 1.0 - cdf), conf)
+        return result
+    except Exception as e:
+        logger.error(f"Erro em calculate_over_probabilities: {e}")
+        return {line: (0.0, 0.0) for line in lines}
+
 def calculate_expected_value(prob: float, odds: float) -> float:
     """
     Retorna EV como prob - (1/odds). Ex: prob=0.6, odds=2 -> EV=0.1 (10%)
@@ -0,0 +1,76 @@
+# src/resilience.py
+"""Primitivas de resiliência partilhadas pelos clientes HTTP (API-Football e Telegram)."""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Disjuntor para um serviço externo: CLOSED -> OPEN após `failure_threshold` falhas seguidas.
+    Aberto, recusa pedidos sem custo de rede; passado `recovery_timeout` deixa passar
+    um único pedido de teste (HALF_OPEN): sucesso volta a fechar, falha reabre.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 60, name: str = "API"):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = "CLOSED"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "CLOSED":
+                return True
+            if self.state == "OPEN" and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self.state = "HALF_OPEN"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = "CLOSED"
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "HALF_OPEN" or self._failures >= self.failure_threshold:
+                if self.state != "OPEN":
+                    logger.error("🚫 %s em falha: pedidos suspensos por %ds", self.name, self.recovery_timeout)
+                self.state = "OPEN"
+                self._opened_at = time.monotonic()
+                self._failures = 0
+
+
+class TokenBucket:
+    """
+    Admissão de pedidos a ritmo constante: um token a cada 1/rate segundos, acumulando
+    até `burst`. Suaviza as rajadas da ThreadPool em vez de as deixar bater no limite.
+    """
+
+    def __init__(self, rate: float, burst: int = 5):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens < 1:
+                time.sleep((1 - self._tokens) / self.rate)
+                self._last = time.monotonic()
+                self._tokens = 0.0
+            else:
+                self._tokens -= 1
+
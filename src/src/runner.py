@@ -1,8 +1,10 @@
 import os
 import logging
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from api_client import APIClient  
-from probability_calculator import BettingCalculator 
+import probability_calculator as calculator
+from database import Database
 
 # --- Configuração de Logging ---
 logger = logging.getLogger('runner')
@@ -10,13 +12,30 @@ logger.setLevel(logging.INFO)
 
 # --- Variável de Ambiente OBRIGATÓRIA ---
 API_KEY_NAME = "API_FOOTBALL_KEY" 
+SEASON = 2024
+
+GOAL_LINES = (0.5, 1.5)
+# Chave da odd de cada linha no dict de get_odds (ex.: 1.5 -> "over_1_5_odds")
+ODDS_KEYS = {line: f"over_{str(line).replace('.', '_')}_odds" for line in GOAL_LINES}
+MAX_WORKERS = 8  # pedidos HTTP em paralelo na fase de coleta
 
 def get_utc_today():
     """
     Render utiliza UTC.
     Esta função garante que a data usada na busca nunca fique no passado.
     """
-    return datetime.datetime.utcnow().date()
+    return datetime.datetime.now(datetime.timezone.utc).date()
+
+
+def collect_fixture_data(client, fixture_id, home_id, away_id, league_id):
+    """Fase de I/O de um jogo -> (home_stats, away_stats, h2h_stats, odds)."""
+    home_stats = client.collect_team_data(home_id, league_id, season=SEASON)
+    away_stats = client.collect_team_data(away_id, league_id, season=SEASON)
+    if not home_stats or not away_stats:
+        return home_stats, away_stats, None, None
+    h2h_stats = client.collect_h2h_data(home_id, away_id)
+    odds = client.get_odds(fixture_id)  # MOCK
+    return home_stats, away_stats, h2h_stats, odds
 
 
 def main():
@@ -50,94 +69,84 @@ def main():
     logger.info("============================================================")
     
 
-    # 3. Inicializa o cliente e a calculadora
+    # 3. Inicializa o cliente (a calculadora é o módulo probability_calculator)
     client = APIClient(api_key=api_key)
-    calculator = BettingCalculator()
 
     league_id = 138  # Championship
     
     # ---------------------------------------------------------------------
     # 4. Busca jogos futuros
     # ---------------------------------------------------------------------
-    fixtures = client.get_fixtures_by_date(date=target_date, league_id=league_id)
+    fixtures = client.get_fixtures(date=target_date, league_id=league_id, season=SEASON)
     
     if not fixtures:
         logger.warning(f"⚠️ Nenhum jogo encontrado para {target_date}. Finalizando.")
         return
 
     opportunities = []
+    valid_fixtures = []
 
     # ---------------------------------------------------------------------
-    # 5. LOOP PRINCIPAL DE ANÁLISE
+    # 5. FILTRO DOS JOGOS (IDs e datas)
     # ---------------------------------------------------------------------
-    for i, fixture in enumerate(fixtures, 1):
-
-        try:
-            fixture_id = int(fixture['fixture']['id'])
-            home_id = int(fixture['teams']['home']['id'])
-            away_id = int(fixture['teams']['away']['id'])
-        except:
-            logger.error(f"❌ Erro ao extrair IDs. Pulando este jogo.")
-            continue
+    # get_fixtures devolve Fixture já validados (jogos sem IDs ficam de fora)
+    for fixture in fixtures:
 
         # NÃO ANALISAR JOGOS QUE JÁ ACONTECERAM (proteção extra)
-        fixture_date_str = fixture['fixture']['date'][:10]
+        fixture_date_str = fixture.date[:10]
         try:
             fixture_date = datetime.datetime.strptime(fixture_date_str, "%Y-%m-%d").date()
-            if fixture_date < today_utc:
-                logger.warning(f"⚠️ Jogo ignorado (data passada): {fixture_date}")
-                continue
-        except:
-            pass
-        
-        home_team = fixture['teams']['home']['name']
-        away_team = fixture['teams']['away']['name']
-        
-        logger.info(f"\n--- Analisando jogo {i}/{len(fixtures)} ---")
-        logger.info(f"⚽ {home_team} vs {away_team}")
-        logger.info(f"   Liga: Championship | ID: {fixture_id}")
-        logger.info(f"   📊 Coletando dados dos times...")
-        
-        # Coleta de dados
-        home_stats = client.collect_team_data(home_id, league_id, season=2024)
-        away_stats = client.collect_team_data(away_id, league_id, season=2024)
-        
+        except ValueError:
+            fixture_date = None
+        if fixture_date and fixture_date < today_utc:
+            logger.warning("⚠️ Jogo ignorado (data passada): %s", fixture_date)
+            continue
+
+        valid_fixtures.append((fixture.id, fixture.home_id, fixture.away_id, fixture.home_name, fixture.away_name))
+
+    # ---------------------------------------------------------------------
+    # 6. COLETA EM PARALELO (I/O): estatísticas, H2H e odds de todos os jogos
+    # ---------------------------------------------------------------------
+    logger.debug("   📊 Coletando dados de %d jogos...", len(valid_fixtures))
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        collected = list(executor.map(
+            lambda v: collect_fixture_data(client, v[0], v[1], v[2], league_id), valid_fixtures
+        ))
+
+    for i, ((fixture_id, _, _, home_team, away_team), (home_stats, away_stats, h2h_stats, odds)) in enumerate(
+            zip(valid_fixtures, collected), 1):
+
+        # Uma linha por jogo; o passo a passo só em DEBUG (formatação adiada pelo logging)
+        logger.info("⚽ [%d/%d] %s vs %s | Liga: Championship | ID: %s",
+                    i, len(valid_fixtures), home_team, away_team, fixture_id)
+
         if not home_stats or not away_stats:
             logger.warning("⚠️ Dados insuficientes. Pulando jogo.")
             continue
-            
-        logger.info(f"   🤝 Coletando dados H2H...")
-        h2h_stats = client.collect_h2h_data(home_id, away_id)
-        
-        logger.info(f"   💰 Buscando odds...")
-        odds = client.get_odds(fixture_id)  # MOCK
         
         # ---------------------------------------------------------------------
-        # 6. CÁLCULOS PARA OVER 0.5 e 1.5
+        # 7. CÁLCULOS PARA OVER 0.5 e 1.5
         # ---------------------------------------------------------------------
-        for goal_line in [0.5, 1.5]:
+        # mu e exp(-mu) calculados uma vez para as duas linhas
+        line_probs = calculator.calculate_over_probabilities(home_stats, away_stats, h2h_stats, GOAL_LINES)
+        for goal_line in GOAL_LINES:
 
-            prob, conf = calculator.calculate_over_probability(home_stats, away_stats, h2h_stats, goal_line)
-            odds_key = f'over_{int(goal_line*10)}_odds'
-            market_odds = odds.get(odds_key)
+            prob, conf = line_probs[goal_line]
+            market_odds = odds.get(ODDS_KEYS[goal_line])
             
             if not market_odds or market_odds <= 1.0:
                 continue
 
-            ev = calculator.calculate_expected_value(prob, market_odds)
-            kelly = calculator.calculate_kelly_criterion(prob, market_odds)
+            # EV em linha (market_odds > 1 garantido acima); Kelly só para quem tem valor
+            ev = max(-1.0, prob - 1.0 / market_odds)
             
-            logger.info(f"   🧮 Calculando probabilidades...")
-            logger.info(f"   📈 Probabilidade Over {goal_line}: {prob*100:.1f}%")
-            logger.info(f"   🎯 Confiança: {conf*100:.0f}%")
-            logger.info(f"   💵 Odds Over {goal_line}: {market_odds:.2f}")
-
             if ev > 0.05:
-                logger.info(f"   ✅ VALOR DETECTADO em Over {goal_line}!")
-                logger.info(f"   💵 EV: {ev*100:.2f}%")
-                logger.info(f"   📊 Kelly Pura (F): {kelly:.2f}%")
+                kelly = calculator.calculate_kelly_criterion(prob, market_odds)
+                logger.info("   ✅ VALOR em Over %s: prob %.1f%% | conf %.0f%% | odd %.2f | EV %.2f%% | Kelly %.2f%%",
+                            goal_line, prob * 100, conf * 100, market_odds, ev * 100, kelly)
                 
                 opportunities.append({
+                    'fixture_id': fixture_id,
                     'team1': home_team,
                     'team2': away_team,
                     'league': 'Championship',
@@ -149,13 +158,17 @@ def main():
                     'kelly': kelly
                 })
             else:
-                logger.info(f"   ⚠️ Sem valor detectado em Over {goal_line} (EV: {ev*100:.2f}%).")
+                logger.info("   ⚠️ Sem valor em Over %s: prob %.1f%% | conf %.0f%% | odd %.2f | EV %.2f%%",
+                            goal_line, prob * 100, conf * 100, market_odds, ev * 100)
     
 
     # ---------------------------------------------------------------------
-    # 7. RANKING FINAL
+    # 8. RANKING FINAL
     # ---------------------------------------------------------------------
     opportunities.sort(key=lambda x: x['ev'], reverse=True)
+
+    # Persiste tudo de uma vez (uma transação) em vez de um commit por jogo
+    Database().save_opportunities(opportunities)
     
     logger.info("\n============================================================")
     logger.info("🎯 OPORTUNIDADES DETECTADAS (RANKED)")
@@ -165,18 +178,18 @@ def main():
         logger.info("Nenhuma oportunidade com valor detectada.")
     else:
         for i, opp in enumerate(opportunities, 1):
-            logger.info(f"\n{i}. {opp['team1']} vs {opp['team2']} | Mercado: {opp['market']}")
-            logger.info(f"   Liga: {opp['league']}")
+            logger.info("\n%d. %s vs %s | Mercado: %s", i, opp['team1'], opp['team2'], opp['market'])
+            logger.info("   Liga: %s", opp['league'])
             logger.info("   ---")
-            logger.info(f"   Probabilidade: {opp['prob']*100:.1f}%")
-            logger.info(f"   Odds Mercado: {opp['odds']:.2f}")
-            logger.info(f"   Expected Value: {opp['ev']*100:.2f}%")
-            logger.info(f"   Confiança: {opp['confidence']*100:.0f}%")
-            logger.info(f"   Kelly Pura (F): {opp['kelly']:.2f}%")
+            logger.info("   Probabilidade: %.1f%%", opp['prob'] * 100)
+            logger.info("   Odds Mercado: %.2f", opp['odds'])
+            logger.info("   Expected Value: %.2f%%", opp['ev'] * 100)
+            logger.info("   Confiança: %.0f%%", opp['confidence'] * 100)
+            logger.info("   Kelly Pura (F): %.2f%%", opp['kelly'])
 
     logger.info("\n============================================================")
     logger.info("✅ ANÁLISE CONCLUÍDA")
-    logger.info(f"🎯 Oportunidades encontradas: {len(opportunities)}")
+    logger.info("🎯 Oportunidades encontradas: %d", len(opportunities))
     logger.info("============================================================")
 
 
@@ -3,16 +3,103 @@ Telegram Notifier - Sistema Over 1.5
 Envia notificações de oportunidades detectadas via Telegram
 """
 
+import atexit
+import hashlib
 import logging
+import queue
+import random
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from collections import Counter, OrderedDict
 from typing import List, Dict, Optional
+from src.resilience import CircuitBreaker, TokenBucket
 
 logger = logging.getLogger(__name__)
 
+# (ligação, leitura): um Telegram inacessível falha em 3s em vez de esperar a leitura toda
+SEND_TIMEOUT = (3, 10)
+TEST_TIMEOUT = (3, 5)
+
+# Mensagens à espera do envio em segundo plano; com a fila cheia envia-se na hora
+QUEUE_SIZE = 500
+# Espera máxima (s) à saída do processo para esvaziar a fila
+FLUSH_TIMEOUT = 30
+
+# Limites do Telegram: ~30 mensagens/s no total e ~20/min para o mesmo grupo
+GLOBAL_RATE, GLOBAL_BURST = 30.0, 30
+CHAT_RATE, CHAT_BURST = 20 / 60.0, 20
+
+# Repetições de um envio em 429/5xx/falha de rede; backoff exponencial com full jitter
+SEND_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+# Disjuntor: após 5 falhas seguidas (5xx/rede) as mensagens falham logo durante 30s
+BREAKER_THRESHOLD = 5
+BREAKER_RECOVERY = 30
+
+# Limite do Telegram é 4096 caracteres por mensagem; margem para o separador
+MAX_MESSAGE_LEN = 4000
+
+# Erros repetidos: reenviados só após 5 min ou à 10.ª ocorrência, com a contagem
+ERROR_REPEAT_WINDOW = 300
+ERROR_REPEAT_COUNT = 10
+ERROR_CACHE_SIZE = 1024
+
+# Mensagem de uma oportunidade: formatada com str.format sobre os campos do dict
+# (os percentuais saem do formato "%" a partir das frações)
+OPPORTUNITY_TEMPLATE = """\
+{quality_emoji} <b>OPORTUNIDADE DETECTADA!</b>
+
+⚽ <b>{home_team} vs {away_team}</b>
+🏆 Liga: {league}
+📅 Data: {match_datetime}
+
+📊 <b>ANÁLISE:</b>
+• Probabilidade: <b>{our_probability:.1%}</b>
+• Odds Over 1.5: <b>{over_1_5_odds:.2f}</b>
+• Expected Value: <b>{expected_value:+.1%}</b>
+
+💰 <b>RECOMENDAÇÃO:</b>
+• Stake: <b>{recommended_stake:.1f}%</b> do bankroll
+• Qualidade: <b>{bet_quality}</b>
+• Risco: <b>{risk_level}</b>
+• Confiança: <b>{confidence:.0f}%</b>
+
+🔢 Edge: {edge:+.1%}"""
+
+
+def _backoff(attempt: int) -> float:
+    """Full jitter: espera aleatória em [0, min(cap, base * 2^tentativa)]."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def _retry_after(response) -> float:
+    """Segundos pedidos num 429: parameters.retry_after do corpo, senão o header Retry-After."""
+    try:
+        return float(response.json()["parameters"]["retry_after"])
+    except Exception:
+        pass
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, TypeError, ValueError):
+        return 1.0
+
 
 class TelegramNotifier:
     """Gerencia notificações via Telegram"""
     
+    # Emojis para qualidade
+    QUALITY_EMOJI = {
+        'EXCELENTE': '🌟',
+        'MUITO BOA': '⭐',
+        'BOA': '✅',
+        'REGULAR': '🟡',
+        'FRACA': '⚪'
+    }
+    
     def __init__(self, bot_token: str, chat_id: str):
         """
         Inicializa notificador Telegram
@@ -24,54 +111,156 @@ class TelegramNotifier:
         self.bot_token = bot_token
         self.chat_id = chat_id
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
-        
-        # Testa conexão
-        if self._test_connection():
-            logger.info("✅ Telegram conectado com sucesso")
-        else:
-            logger.warning("⚠️ Falha ao conectar com Telegram")
+        self.send_url = f"{self.base_url}/sendMessage"
+        # Sessão keep-alive: um só handshake TCP+TLS com api.telegram.org, reaproveitado
+        # por todas as mensagens. Sem retries no urllib3.
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0))
+        # Ritmo de envio dentro dos limites, em vez de rajadas que acabam em 429
+        self._global_bucket = TokenBucket(rate=GLOBAL_RATE, burst=GLOBAL_BURST)
+        self._chat_bucket = TokenBucket(rate=CHAT_RATE, burst=CHAT_BURST)
+        # Com o Telegram em baixo não se espera o timeout em cada mensagem
+        self.breaker = CircuitBreaker(failure_threshold=BREAKER_THRESHOLD, recovery_timeout=BREAKER_RECOVERY, name="Telegram")
+        # hash do erro -> (último envio, ocorrências desde então); LRU limitado
+        self._error_cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._error_lock = threading.Lock()
+
+        # Envio em segundo plano: notify_* só põe a mensagem na fila e volta logo,
+        # sem prender a análise ao tempo de ida e volta do Telegram
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=QUEUE_SIZE)
+        self._worker_thread = threading.Thread(target=self._worker, name="telegram-sender", daemon=True)
+        self._worker_thread.start()
+        # A thread é daemon: à saída do processo dá-se tempo para enviar o que falta
+        atexit.register(self.flush, FLUSH_TIMEOUT)
     
     def _test_connection(self) -> bool:
         """Testa conexão com Telegram"""
         try:
-            response = requests.get(f"{self.base_url}/getMe", timeout=5)
+            response = self.session.get(f"{self.base_url}/getMe", timeout=TEST_TIMEOUT)
             return response.status_code == 200
         except Exception as e:
-            logger.error(f"Erro ao testar Telegram: {e}")
+            logger.error("Erro ao testar Telegram: %s", e)
             return False
     
+    def _worker(self):
+        """Thread de envio: testa a ligação e drena a fila até receber o sentinela None."""
+        # O teste corre aqui e não no __init__: o arranque não espera pelo getMe, e as
+        # mensagens postas na fila entretanto só saem depois dele
+        if self._test_connection():
+            logger.info("✅ Telegram conectado com sucesso")
+        else:
+            logger.warning("⚠️ Falha ao conectar com Telegram")
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._send_sync(*item)
+            except Exception as e:
+                logger.error("❌ Exceção no envio em segundo plano: %s", e)
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera que a fila seja enviada; False se o timeout acabar antes."""
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def close(self, timeout: Optional[float] = FLUSH_TIMEOUT):
+        """Envia o que está na fila, pára a thread de envio e fecha o pool da sessão."""
+        if self._worker_thread.is_alive():
+            self.flush(timeout)
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass
+            self._worker_thread.join(timeout)
+        self.session.close()
+    
     def send_message(self, text: str, parse_mode: str = "HTML") -> bool:
         """
-        Envia mensagem para o Telegram
+        Põe a mensagem na fila de envio e volta de imediato
         
         Args:
             text: Texto da mensagem
             parse_mode: Modo de formatação (HTML ou Markdown)
             
         Returns:
-            True se enviado com sucesso
+            True se ficou na fila (ou, com a fila cheia, se foi enviada na hora)
         """
-        try:
-            url = f"{self.base_url}/sendMessage"
-            data = {
-                "chat_id": self.chat_id,
-                "text": text,
-                "parse_mode": parse_mode,
-                "disable_web_page_preview": True
-            }
-            
-            response = requests.post(url, json=data, timeout=10)
-            
-            if response.status_code == 200:
-                logger.info("✅ Mensagem Telegram enviada")
+        if self._worker_thread.is_alive():
+            try:
+                self._queue.put_nowait((text, parse_mode))
                 return True
-            else:
-                logger.error(f"❌ Erro ao enviar Telegram: {response.text}")
+            except queue.Full:
+                logger.warning("⚠️ Fila do Telegram cheia: envio síncrono")
+        return self._send_sync(text, parse_mode)
+
+    def _send_sync(self, text: str, parse_mode: str = "HTML") -> bool:
+        """
+        Envia mensagem para o Telegram (bloqueia até à resposta)
+        
+        429 espera o retry_after indicado pelo Telegram; 5xx, timeouts e falhas de
+        ligação repetem com backoff. Os restantes 4xx (token, chat inválido) não se
+        repetem: a mesma mensagem falharia da mesma forma.
+        
+        Returns:
+            True se enviado com sucesso
+        """
+        data = {
+            "chat_id": self.chat_id,
+            "text": text,
+            "parse_mode": parse_mode,
+            "disable_web_page_preview": True
+        }
+        for attempt in range(SEND_RETRIES):
+            if not self.breaker.allow():
+                logger.warning("🚫 Telegram indisponível (disjuntor aberto): mensagem não enviada")
                 return False
-                
-        except Exception as e:
-            logger.error(f"❌ Exceção ao enviar Telegram: {e}")
-            return False
+            self._global_bucket.acquire()
+            self._chat_bucket.acquire()
+            try:
+                response = self.session.post(self.send_url, json=data, timeout=SEND_TIMEOUT)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                self.breaker.record_failure()
+                wait = _backoff(attempt)
+                logger.warning("⚠️ Falha de rede no Telegram (%s): nova tentativa em %.1fs", e, wait)
+            except Exception as e:
+                # Registar sempre um resultado depois de allow(): um teste HALF_OPEN sem
+                # resultado deixaria o disjuntor fechado ao Telegram até ao fim do processo
+                self.breaker.record_failure()
+                logger.error("❌ Exceção ao enviar Telegram: %s", e)
+                return False
+            else:
+                # 429 e outros 4xx também provam que o Telegram responde
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if response.status_code == 200:
+                    logger.info("✅ Mensagem Telegram enviada")
+                    return True
+                if response.status_code == 429:
+                    wait = _retry_after(response)
+                    logger.warning("⚠️ Telegram 429: a aguardar %.1fs", wait)
+                elif response.status_code >= 500:
+                    wait = _backoff(attempt)
+                    logger.warning("⚠️ Telegram HTTP %s: nova tentativa em %.1fs", response.status_code, wait)
+                else:
+                    logger.error("❌ Erro ao enviar Telegram: %s", response.text)
+                    return False
+            if attempt < SEND_RETRIES - 1:
+                time.sleep(wait)
+        logger.error("❌ Mensagem Telegram perdida após %d tentativas", SEND_RETRIES)
+        return False
+    
+    def _format_opportunity(self, opportunity: Dict) -> str:
+        """Texto HTML de uma oportunidade (KeyError se faltarem campos)"""
+        return OPPORTUNITY_TEMPLATE.format(
+            quality_emoji=self.QUALITY_EMOJI.get(opportunity['bet_quality'], '⚽'),
+            match_datetime=opportunity['match_date'][:16].replace('T', ' '),
+            **opportunity
+        )
     
     def notify_opportunity(self, opportunity: Dict) -> bool:
         """
@@ -81,44 +270,42 @@ class TelegramNotifier:
             opportunity: Dict com dados da oportunidade
         """
         try:
-            # Emojis para qualidade
-            quality_emoji = {
-                'EXCELENTE': '🌟',
-                'MUITO BOA': '⭐',
-                'BOA': '✅',
-                'REGULAR': '🟡',
-                'FRACA': '⚪'
-            }
-            
-            emoji = quality_emoji.get(opportunity['bet_quality'], '⚽')
-            
-            message = f"""
-{emoji} <b>OPORTUNIDADE DETECTADA!</b>
-
-⚽ <b>{opportunity['home_team']} vs {opportunity['away_team']}</b>
-🏆 Liga: {opportunity['league']}
-📅 Data: {opportunity['match_date'][:16].replace('T', ' ')}
-
-📊 <b>ANÁLISE:</b>
-• Probabilidade: <b>{opportunity['our_probability']*100:.1f}%</b>
-• Odds Over 1.5: <b>{opportunity['over_1_5_odds']:.2f}</b>
-• Expected Value: <b>{opportunity['expected_value']*100:+.1f}%</b>
-
-💰 <b>RECOMENDAÇÃO:</b>
-• Stake: <b>{opportunity['recommended_stake']:.1f}%</b> do bankroll
-• Qualidade: <b>{opportunity['bet_quality']}</b>
-• Risco: <b>{opportunity['risk_level']}</b>
-• Confiança: <b>{opportunity['confidence']:.0f}%</b>
-
-🔢 Edge: {opportunity['edge']*100:+.1f}%
-            """.strip()
-            
-            return self.send_message(message)
-            
+            return self.send_message(self._format_opportunity(opportunity))
         except Exception as e:
-            logger.error(f"Erro ao notificar oportunidade: {e}")
+            logger.error("Erro ao notificar oportunidade: %s", e)
             return False
     
+    def notify_opportunities(self, opportunities: List[Dict]) -> bool:
+        """
+        Notifica várias oportunidades agrupadas no menor número de mensagens
+        (cada uma até MAX_MESSAGE_LEN caracteres) em vez de uma mensagem por jogo
+        
+        Args:
+            opportunities: Lista de oportunidades detectadas
+            
+        Returns:
+            True se todas as mensagens foram enviadas
+        """
+        ok = True
+        chunk: List[str] = []
+        size = 0
+        for opportunity in opportunities:
+            try:
+                text = self._format_opportunity(opportunity)
+            except Exception as e:
+                logger.error("Erro ao notificar oportunidade: %s", e)
+                ok = False
+                continue
+            # +2 do separador entre blocos
+            if chunk and size + len(text) + 2 > MAX_MESSAGE_LEN:
+                ok = self.send_message("\n\n".join(chunk)) and ok
+                chunk, size = [], 0
+            chunk.append(text)
+            size += len(text) + 2
+        if chunk:
+            ok = self.send_message("\n\n".join(chunk)) and ok
+        return ok
+    
     def notify_daily_summary(self, opportunities: List[Dict], total_matches: int) -> bool:
         """
         Envia resumo diário da análise
@@ -141,16 +328,16 @@ Critérios aplicados:
 • EV ≥ +5%
                 """.strip()
             else:
-                # Estatísticas
-                avg_ev = sum(o['expected_value'] for o in opportunities) / len(opportunities)
-                avg_prob = sum(o['our_probability'] for o in opportunities) / len(opportunities)
-                total_stake = sum(o['recommended_stake'] for o in opportunities)
-                
-                # Distribuição por qualidade
-                quality_dist = {}
+                # Estatísticas e distribuição por qualidade numa única passagem
+                ev_sum = prob_sum = total_stake = 0.0
+                quality_dist = Counter()
                 for opp in opportunities:
-                    q = opp['bet_quality']
-                    quality_dist[q] = quality_dist.get(q, 0) + 1
+                    ev_sum += opp['expected_value']
+                    prob_sum += opp['our_probability']
+                    total_stake += opp['recommended_stake']
+                    quality_dist[opp['bet_quality']] += 1
+                avg_ev = ev_sum / len(opportunities)
+                avg_prob = prob_sum / len(opportunities)
                 
                 quality_text = '\n'.join(
                     f"  • {q}: {count}x"
@@ -177,7 +364,7 @@ Critérios aplicados:
             return self.send_message(message)
             
         except Exception as e:
-            logger.error(f"Erro ao enviar resumo diário: {e}")
+            logger.error("Erro ao enviar resumo diário: %s", e)
             return False
     
     def notify_analysis_start(self, total_matches: int) -> bool:
@@ -192,11 +379,32 @@ Critérios aplicados:
         return self.send_message(message)
     
     def notify_error(self, error_message: str) -> bool:
-        """Notifica erro no sistema"""
+        """
+        Notifica erro no sistema
+        
+        O mesmo erro em ciclo não inunda o chat: repetições dentro de
+        ERROR_REPEAT_WINDOW são contadas e enviadas numa única mensagem "(xN)"
+        """
+        key = hashlib.sha1(error_message.encode()).digest()[:8]
+        now = time.monotonic()
+        with self._error_lock:
+            last_sent, count = self._error_cache.get(key, (None, 0))
+            count += 1
+            suppress = (last_sent is not None and now - last_sent < ERROR_REPEAT_WINDOW
+                        and count < ERROR_REPEAT_COUNT)
+            self._error_cache[key] = (last_sent, count) if suppress else (now, 0)
+            self._error_cache.move_to_end(key)
+            if suppress:
+                logger.debug("Erro repetido não enviado (x%d): %s", count, error_message)
+                return False
+            while len(self._error_cache) > ERROR_CACHE_SIZE:
+                self._error_cache.popitem(last=False)
+        
+        repeated = f" (x{count})" if count > 1 else ""
         message = f"""
 ⚠️ <b>ERRO NO SISTEMA</b>
 
-❌ {error_message}
+❌ {error_message}{repeated}
 
 Por favor, verifique os logs.
         """.strip()
@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Sequence
 
 logger = logging.getLogger(__name__)
 
@@ -48,7 +48,7 @@ class ValueDetector:
             
         suggested_stake = min(self.max_kelly_fraction, max(0.0, pure_kelly_fraction))
         
-        logger.debug(f"Prob: {probability:.3f}, Odds: {market_odds:.2f}, EV: {expected_value:.2f}, Kelly: {pure_kelly_fraction:.2f}")
+        logger.debug("Prob: %.3f, Odds: %.2f, EV: %.2f, Kelly: %.2f", probability, market_odds, expected_value, pure_kelly_fraction)
 
         return {
             'is_value': is_value,
@@ -58,6 +58,33 @@ class ValueDetector:
             'suggested_stake': suggested_stake 
         }
 
+    def detect_values(self, probabilities: Sequence[float], market_odds: Sequence[float]) -> List[Dict[str, Any]]:
+        """
+        Versão em lote de detect_value: avalia todos os jogos de um ciclo de análise
+        numa só passagem, sem uma chamada de método (nem log) por jogo.
+        
+        Args:
+            probabilities (Sequence[float]): Probabilidades do modelo, uma por jogo.
+            market_odds (Sequence[float]): Odds de mercado, na mesma ordem.
+            
+        Returns:
+            List[Dict]: Um resultado por jogo, com as mesmas chaves de detect_value.
+        """
+        required_ev = self.required_ev
+        max_kelly = self.max_kelly_fraction
+        results = []
+        for probability, odds in zip(probabilities, market_odds):
+            expected_value = probability * odds - 1
+            pure_kelly_fraction = expected_value / (odds - 1) if odds > 1.0 else 0.0
+            results.append({
+                'is_value': expected_value > required_ev,
+                'expected_value': expected_value,
+                'fair_odd': 1 / probability if probability > 0 else float('inf'),
+                'pure_kelly_fraction': pure_kelly_fraction,
+                'suggested_stake': min(max_kelly, max(0.0, pure_kelly_fraction)),
+            })
+        return results
+
     def rank_opportunities(self, opportunities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Rankea as oportunidades com base no Expected Value (EV) e na Confiança.
@@ -72,9 +99,8 @@ class ValueDetector:
         if not opportunities:
             return []
         
-        # Classifica por EV (decrescente) e depois por Confiança (decrescente)
-        # Multiplicamos por -1 para obter a classificação decrescente
-        return sorted(
-            opportunities, 
-            key=lambda x: (x['expected_value'] * -1, x['confidence'] * -1)
-        )
+        # Classifica por EV (decrescente) e depois por Confiança (decrescente).
+        # Chaves lidas uma vez por oportunidade; a ordenação compara tuplos em C
+        keys = [(o['expected_value'], o['confidence']) for o in opportunities]
+        order = sorted(range(len(opportunities)), key=keys.__getitem__, reverse=True)
+        return [opportunities[i] for i in order]
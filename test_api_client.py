@@ -0,0 +1,180 @@
+"""
+Testes do APIClient - Sistema Over 1.5
+Pedidos HTTP simulados por uma sessão falsa (sem rede nem chave real)
+"""
+
+import json
+import threading
+import time
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from src.api_client import SUCCESS_STEP, APIClient, RateLimited
+
+ENDPOINT = "teams/statistics"
+PARAMS = {"team": 1, "league": 39, "season": 2024}
+BODY = {"errors": [], "response": {"goals": {}}}
+
+
+class FakeResponse:
+    """Resposta mínima com a interface de requests.Response usada pelo cliente"""
+
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self.content = json.dumps(BODY if body is None else body).encode()
+        self.headers = CaseInsensitiveDict(headers or {})
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """Devolve as respostas pela ordem dada (a última repete-se) e regista cada GET"""
+
+    def __init__(self, *responses, on_get=None):
+        self.responses = list(responses) or [FakeResponse()]
+        self.on_get = on_get
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        with self._lock:
+            self.calls.append({"url": url, "params": params, "headers": headers or {}})
+            response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if self.on_get:
+            self.on_get()
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Cliente com cache num diretório temporário e limitador de ritmo folgado"""
+    monkeypatch.setenv("APICACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("API_RPM", "60000")
+    c = APIClient("test-key")
+    yield c
+    c.close()
+
+
+# ==================== CACHE ====================
+
+def test_repeated_call_served_from_cache(client):
+    """Pedido repetido dentro do TTL não volta à rede"""
+    client.session = FakeSession()
+    assert client._make_request(ENDPOINT, PARAMS) == BODY
+    assert client._make_request(ENDPOINT, PARAMS) == BODY
+    assert len(client.session.calls) == 1
+
+
+def test_error_payload_not_cached(client, tmp_path):
+    """Corpo com 'errors' (HTTP 200) é devolvido mas nunca guardado em cache"""
+    error_body = {"errors": {"token": "Error/Missing application key"}, "response": []}
+    client.session = FakeSession(FakeResponse(body=error_body))
+    assert client._make_request(ENDPOINT, PARAMS) == error_body
+    assert client._make_request(ENDPOINT, PARAMS) == error_body
+    assert len(client.session.calls) == 2
+    assert not list(tmp_path.glob("*.json"))
+
+
+def test_not_modified_served_from_cache(client, monkeypatch):
+    """Entrada expirada é revalidada com If-None-Match e um 304 devolve o corpo guardado"""
+    client.session = FakeSession(FakeResponse(headers={"ETag": '"v1"'}), FakeResponse(304))
+    assert client._make_request(ENDPOINT, PARAMS) == BODY
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 2 * 86400)
+    assert client._make_request(ENDPOINT, PARAMS) == BODY
+    assert len(client.session.calls) == 2
+    assert client.session.calls[1]["headers"].get("If-None-Match") == '"v1"'
+
+
+# ==================== CONCORRÊNCIA (AIMD) ====================
+
+def test_aimd_halves_on_errors_and_grows_on_success(client):
+    """Concorrência cai para metade em 5xx/429 e sobe +1 a cada SUCCESS_STEP sucessos"""
+    client.session = FakeSession(FakeResponse(503), FakeResponse(429), FakeResponse())
+    start = client._concurrency
+
+    with pytest.raises(requests.HTTPError):
+        client._make_request(ENDPOINT, PARAMS)
+    assert client._concurrency == start // 2
+    with pytest.raises(RateLimited):
+        client._make_request(ENDPOINT, PARAMS)
+    assert client._concurrency == start // 4
+
+    for team in range(SUCCESS_STEP):
+        client._make_request(ENDPOINT, {**PARAMS, "team": team})
+    assert client._concurrency == start // 4 + 1
+
+
+# ==================== DISJUNTOR ====================
+
+def test_circuit_breaker_cycle(client):
+    """CLOSED -> OPEN após falhas seguidas -> HALF_OPEN passado o recovery -> CLOSED"""
+    client.breaker.failure_threshold = 3
+    client.breaker.recovery_timeout = 3600
+    client.session = FakeSession(FakeResponse(503), FakeResponse(503), FakeResponse(503), FakeResponse())
+    assert client.breaker.state == "CLOSED"
+
+    for _ in range(3):
+        with pytest.raises(requests.HTTPError):
+            client._make_request(ENDPOINT, PARAMS)
+    assert client.breaker.state == "OPEN"
+
+    # Aberto: recusa sem ir à rede
+    assert client._make_request(ENDPOINT, PARAMS) is None
+    assert len(client.session.calls) == 3
+
+    # Passado o recovery_timeout segue um único pedido de teste
+    states = []
+    client.session.on_get = lambda: states.append(client.breaker.state)
+    client.breaker.recovery_timeout = 0
+    assert client._make_request(ENDPOINT, PARAMS) == BODY
+    assert states == ["HALF_OPEN"]
+    assert client.breaker.state == "CLOSED"
+
+
+# ==================== SINGLE-FLIGHT ====================
+
+def test_concurrent_identical_calls_share_one_request(client):
+    """Pedidos iguais em simultâneo fazem um único GET e recebem o mesmo corpo"""
+    entered, release = threading.Event(), threading.Event()
+
+    def block():
+        entered.set()
+        release.wait(5)
+
+    client.session = FakeSession(on_get=block)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client._make_request(ENDPOINT, PARAMS)))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    assert entered.wait(5)
+    # Dá tempo às restantes threads para chegarem ao pedido em curso
+    time.sleep(0.2)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(client.session.calls) == 1
+    assert results == [BODY] * 5
+
+
+# ==================== QUOTA DIÁRIA ====================
+
+def test_exhausted_daily_quota_stops_sending(client):
+    """Com x-ratelimit-requests-remaining a zero os pedidos seguintes não são enviados"""
+    client.session = FakeSession(FakeResponse(headers={"x-ratelimit-requests-remaining": "0"}))
+    assert client._make_request(ENDPOINT, PARAMS) == BODY
+    assert client._make_request(ENDPOINT, {**PARAMS, "team": 2}) is None
+    assert len(client.session.calls) == 1
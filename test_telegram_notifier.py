@@ -0,0 +1,154 @@
+"""
+Testes do TelegramNotifier - Sistema Over 1.5
+Envios simulados por uma sessão falsa (sem rede nem bot real)
+"""
+
+import threading
+import time
+
+import pytest
+import requests
+
+from src import telegram_notifier
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, text="ok"):
+        self.status_code = status_code
+        self.text = text
+        self.headers = {}
+
+    def json(self):
+        return {}
+
+
+class FakeSession:
+    """Substitui requests.Session: getMe responde 200, sendMessage pela ordem dada"""
+
+    def __init__(self):
+        self.responses = [FakeResponse()]
+        self.on_post = None
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def get(self, url, timeout=None):
+        return FakeResponse()
+
+    def post(self, url, json=None, timeout=None):
+        if self.on_post:
+            self.on_post()
+        with self._lock:
+            self.sent.append(json["text"])
+            return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def registered(monkeypatch):
+    """Funções registadas no atexit pelo notificador (não chegam ao atexit real)"""
+    calls = []
+    monkeypatch.setattr(telegram_notifier.atexit, "register", lambda func, *args: calls.append((func, args)))
+    return calls
+
+
+@pytest.fixture
+def notifier(monkeypatch, registered):
+    monkeypatch.setattr(requests, "Session", FakeSession)
+    n = telegram_notifier.TelegramNotifier("token", "chat")
+    yield n
+    n.close(timeout=5)
+
+
+# ==================== ENVIO EM SEGUNDO PLANO ====================
+
+def test_flush_at_exit_sends_queued_messages(notifier, registered):
+    """send_message volta logo; a função registada no atexit espera pela fila"""
+    notifier.session.on_post = lambda: time.sleep(0.05)
+    for i in range(3):
+        assert notifier.send_message(f"mensagem {i}")
+
+    assert [func for func, _ in registered] == [notifier.flush]
+    func, args = registered[0]
+    assert func(*args)
+    assert notifier.session.sent == ["mensagem 0", "mensagem 1", "mensagem 2"]
+
+
+# ==================== DISJUNTOR ====================
+
+def test_circuit_breaker_stops_sending(notifier, monkeypatch):
+    """Falhas 5xx seguidas abrem o disjuntor; passado o recovery um teste volta a fechá-lo"""
+    monkeypatch.setattr(telegram_notifier, "_backoff", lambda attempt: 0)
+    notifier.breaker.recovery_timeout = 3600
+    notifier.session.responses = [FakeResponse(502)] * telegram_notifier.BREAKER_THRESHOLD + [FakeResponse()]
+
+    assert not notifier._send_sync("a")
+    assert notifier.breaker.state == "OPEN"
+    assert not notifier._send_sync("b")
+    assert len(notifier.session.sent) == telegram_notifier.BREAKER_THRESHOLD
+
+    notifier.breaker.recovery_timeout = 0
+    assert notifier._send_sync("c")
+    assert notifier.breaker.state == "CLOSED"
+
+
+# ==================== AGRUPAMENTO ====================
+
+def make_opportunity(i):
+    return {
+        'home_team': f"Casa {i}", 'away_team': f"Fora {i}", 'league': "Premier League",
+        'match_date': "2025-01-01T15:00:00+00:00", 'our_probability': 0.78,
+        'over_1_5_odds': 1.45, 'expected_value': 0.13, 'recommended_stake': 2.0,
+        'bet_quality': "BOA", 'risk_level': "BAIXO", 'confidence': 72.0, 'edge': 0.09,
+    }
+
+
+def test_opportunities_split_under_max_message_len(notifier):
+    """Oportunidades agrupadas em poucas mensagens, nenhuma acima de MAX_MESSAGE_LEN"""
+    assert notifier.notify_opportunities([make_opportunity(i) for i in range(15)])
+    assert notifier.flush(5)
+
+    sent = notifier.session.sent
+    assert 1 < len(sent) < 15
+    assert all(len(text) <= telegram_notifier.MAX_MESSAGE_LEN for text in sent)
+    assert sum(text.count("OPORTUNIDADE DETECTADA") for text in sent) == 15
+
+
+# ==================== ERROS REPETIDOS ====================
+
+class FakeClock:
+    """time.monotonic parado, avançado à mão (parte do valor real: os token buckets também o leem)"""
+
+    def __init__(self):
+        self.now = time.monotonic()
+
+    def __call__(self):
+        return self.now
+
+
+def test_repeated_errors_collapsed(notifier, monkeypatch):
+    """Repetições dentro da janela não são enviadas até à 10.ª; depois dela segue a contagem"""
+    clock = FakeClock()
+    monkeypatch.setattr(telegram_notifier.time, "monotonic", clock)
+
+    assert notifier.notify_error("API em baixo")
+    for _ in range(telegram_notifier.ERROR_REPEAT_COUNT - 1):
+        assert not notifier.notify_error("API em baixo")
+    assert notifier.notify_error("API em baixo")
+
+    assert not notifier.notify_error("API em baixo")
+    clock.now += telegram_notifier.ERROR_REPEAT_WINDOW
+    assert notifier.notify_error("API em baixo")
+    assert notifier.notify_error("Outro erro")
+
+    assert notifier.flush(5)
+    sent = notifier.session.sent
+    assert len(sent) == 4
+    assert "(x" not in sent[0]
+    assert f"(x{telegram_notifier.ERROR_REPEAT_COUNT})" in sent[1]
+    assert "(x2)" in sent[2]
+    assert "Outro erro" in sent[3] and "(x" not in sent[3]